@@ -0,0 +1,81 @@
+from typing import Any, NamedTuple, Optional, Tuple
+
+BONUS = "bonus"
+MULTIPLIER = "multiplier"
+
+
+class AdjustmentRule(NamedTuple):
+    """
+    One row of an adjustment table.
+
+    When ``field`` of the ``section`` of the project data passes the ``test``
+    against ``value``, the works matching ``description`` (and ``work_type``
+    if given) either gain weight x profile factor of ``criterion`` (bonus) or
+    have their score multiplied by ``factor`` (multiplier).
+    """
+    section: str
+    field: str
+    test: str
+    value: Any
+    description: str
+    work_type: Optional[str]
+    action: str
+    criterion: Optional[str] = None
+    factor: float = 1.0
+
+    def matches(self, value: Any) -> bool:
+        if self.test == "==":
+            return value == self.value
+        if self.test == "!=":
+            return value != self.value
+        if self.test == "in":
+            return value in self.value
+        if self.test == "not in":
+            return value not in self.value
+        raise ValueError(f"Invalid test: {self.test}")
+
+
+# Within a table, multipliers are applied before bonuses; bonuses are added in table order.
+HOUSING_RULES: Tuple[AdjustmentRule, ...] = (
+    # Heating
+    AdjustmentRule('housingData', 'heatingType', "!=", "pompe_a_chaleur", "Heat pump", None,
+                   BONUS, criterion='Durabilité environnementale'),
+    AdjustmentRule('housingData', 'heatingType', "==", "pompe_a_chaleur", "Heat pump", None,
+                   MULTIPLIER, factor=0),
+    # Programmable thermostat
+    AdjustmentRule('housingData', 'programmableThermostat', "==", "non", "Thermostat Programmable", None,
+                   BONUS, criterion='Économies d\'énergie'),
+    AdjustmentRule('housingData', 'programmableThermostat', "!=", "non", "Thermostat Programmable", None,
+                   MULTIPLIER, factor=0),
+    # Temperature
+    AdjustmentRule('housingData', 'averageTemperature', "==", "<18", "Thermostat Programmable", None,
+                   BONUS, criterion='Économies d\'énergie'),
+    AdjustmentRule('housingData', 'averageTemperature', "==", "<18", "Isolation thermique des murs", None,
+                   BONUS, criterion='Confort et bien-être'),
+    AdjustmentRule('housingData', 'averageTemperature', "==", "<18", "Isolation thermique du toit ou des combles", None,
+                   BONUS, criterion='Isolation thermique'),
+    AdjustmentRule('housingData', 'averageTemperature', "==", "<18", "Isolation thermique des sols", None,
+                   BONUS, criterion='Confort et bien-être'),
+    # Insulation
+    AdjustmentRule('housingData', 'wallInsulation', "==", "non", "Isolation thermique des murs", None,
+                   BONUS, criterion='Isolation thermique'),
+    AdjustmentRule('housingData', 'roofInsulation', "==", "non", "Isolation thermique du toit ou des combles", None,
+                   BONUS, criterion='Isolation thermique'),
+    AdjustmentRule('housingData', 'floorInsulation', "==", "non", "Isolation thermique des sols", None,
+                   BONUS, criterion='Isolation thermique'),
+)
+
+TECHNICAL_RULES: Tuple[AdjustmentRule, ...] = (
+    AdjustmentRule('technicalData', 'hasSolarPanels', "==", "non", "Installation de panneaux photovoltaïques", None,
+                   BONUS, criterion='Production d\'énergie renouvelable'),
+    AdjustmentRule('technicalData', 'hasWaterHeater', "==", "non", "Chauffe-eau solaire", None,
+                   BONUS, criterion='Durabilité environnementale'),
+    AdjustmentRule('technicalData', 'boilerType', "!=", "pompe_a_chaleur", "Pompe à chaleur", "Eau chaude",
+                   BONUS, criterion='Durabilité environnementale'),
+    AdjustmentRule('technicalData', 'ventilationType', "not in", ("mechanique", "double_flux"),
+                   "Ventilation double flux avec échangeur thermique", None,
+                   BONUS, criterion='Confort et bien-être'),
+    AdjustmentRule('technicalData', 'ventilationType', "not in", ("mechanique", "double_flux"),
+                   "Ventilation double flux avec échangeur thermique", None,
+                   BONUS, criterion='Économies d\'énergie'),
+)
@@ -1,19 +1,21 @@
 import datetime
+import hmac
 import logging
 import os
 from datetime import timedelta
 
-import psycopg2
 from dotenv import load_dotenv
 from fastapi import HTTPException, Depends, Security
 from fastapi.security import OAuth2PasswordBearer, SecurityScopes
 from jose import jwt, JWTError, ExpiredSignatureError
-from passlib.context import CryptContext
 from pydantic import EmailStr
 from starlette import status
 
-from app.database.config import load_config
+from app.database.pool import get_connection
+from app.hashing import pwd_context, password_hasher
+from app.metrics import request_timer, timed
 from app.pydantic_models import TokenData
+from app.result_cache import ResultCache
 
 load_dotenv()
 
@@ -21,7 +23,11 @@ SECRET_KEY = os.getenv('POSTGRES_PASSWORD')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Owners known to still exist, so that authenticated requests skip the database.
+# Each worker has its own cache: a deleted account stays valid elsewhere for at most OWNER_CACHE_TTL seconds.
+OWNER_CACHE_TTL = float(os.getenv('OWNER_CACHE_TTL', '60'))
+owner_cache = ResultCache(maxsize=int(os.getenv('OWNER_CACHE_SIZE', '10000')), ttl=OWNER_CACHE_TTL)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 def hash_password(password: str):
@@ -36,35 +42,59 @@ def create_access_token(data: dict):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def authenticate_user(email: str, password: str):
-    user = get_user_with_role(email)
-    if not user or not verify_password(password, user["password"]):
+async def authenticate_user(email: str, password: str):
+    user = await get_user_with_role(email)
+    if not user:
+        return None
+    with request_timer("auth"):
+        valid, new_hash = await password_hasher.verify_and_update(password, user["password"])
+    if not valid:
         return None
+    if new_hash:
+        # The stored hash was made with another cost factor
+        await update_password(user["id"], new_hash)
     return user
 
-def verify_user(email: EmailStr):
-    config = load_config()
-    with psycopg2.connect(**config) as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT id FROM Owner WHERE email = %s", (email,))
-            user = cur.fetchone()
-            if not user:
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
+async def update_password(owner_id: int, hashed_password: str):
+    async with get_connection() as conn:
+        await conn.execute("UPDATE Owner SET password = %s WHERE id = %s", (hashed_password, owner_id))
+
+async def verify_user(email: EmailStr):
+    user = await get_user_with_role(email)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
+    return user
 
-def verify_token(token: str = Depends(oauth2_scheme)):
+async def owner_exists(owner_id: int) -> bool:
+    if owner_cache.get(owner_id):
+        return True
+    async with get_connection() as conn:
+        cur = await conn.execute("SELECT 1 FROM Owner WHERE id = %s", (owner_id,))
+        exists = await cur.fetchone() is not None
+    if exists:
+        owner_cache.put(owner_id, True)
+    return exists
+
+def invalidate_owner(owner_id: int):
+    owner_cache.invalidate(owner_id)
+
+@timed("auth")
+async def verify_token(token: str = Depends(oauth2_scheme)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email = payload.get("sub")
         if not email:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token.")
 
-        config = load_config()
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT id FROM Owner WHERE email = %s", (email,))
-                user = cur.fetchone()
-                if not user:
-                    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found.")
+        owner_id = payload.get("uid")
+        if owner_id is None:
+            # Tokens issued before the owner id was part of the claims
+            user = await get_user_with_role(email)
+            if not user:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found.")
+            payload["uid"] = user["id"]
+        elif not await owner_exists(owner_id):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found.")
 
         return payload
     except ExpiredSignatureError:
@@ -81,20 +111,20 @@ def verify_expired_token(token: str) -> bool:
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid.")
 
-def get_user_with_role(email: str):
-    config = load_config()
-    with psycopg2.connect(**config) as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT email, password, is_admin FROM Owner WHERE email = %s", (email,))
-            user = cur.fetchone()
-            if user:
-                return {
-                    "email": user[0],
-                    "password": user[1],
-                    "is_admin": user[2]
-                }
+async def get_user_with_role(email: str):
+    async with get_connection() as conn:
+        cur = await conn.execute("SELECT id, email, password, is_admin FROM Owner WHERE email = %s", (email,))
+        user = await cur.fetchone()
+        if user:
+            return {
+                "id": user[0],
+                "email": user[1],
+                "password": user[2],
+                "is_admin": user[3]
+            }
     return None
 
+@timed("auth")
 async def get_current_user(
         token: str = Depends(oauth2_scheme)
 ):
@@ -109,10 +139,19 @@ async def get_current_user(
         raise HTTPException(status_code=401, detail="Token invalide")
     return token_data
 
-def check_admin(user: TokenData = Security(get_current_user)):
+async def check_admin(user: TokenData = Security(get_current_user)):
     if not user.is_admin:
         raise HTTPException(
             status_code=403,
             detail="Permission refusée : accès administrateur requis"
         )
     return user
+
+
+# Static bearer token for Prometheus scrapers, which cannot log in and refresh a JWT
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+async def check_metrics_access(token: str = Depends(oauth2_scheme)):
+    if METRICS_TOKEN and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        return
+    await check_admin(await get_current_user(token))
@@ -0,0 +1,125 @@
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from app.catalog import WorkCatalog, get_catalog
+from app.pydantic_models import ProjectRequest
+from app.scoring import get_scoring_tables, base_scores, apply_budget_adjustments, eligible_grants, rank_works
+from app.simulation import PROFILE_FACTORS, GRANT_CEILINGS, calculate_income_category, calculate_roof_surface, \
+    calculate_wall_surface
+from app.weighting_registry import get_weighting
+
+
+class BatchResult:
+    """Rankings of many projects against the same work catalog."""
+
+    __slots__ = ("catalog", "income_categories", "scores", "grants", "rankings")
+
+    def __init__(self, catalog: WorkCatalog, income_categories: List[str], scores: np.ndarray, grants: np.ndarray,
+                 rankings: List[np.ndarray]):
+        """
+        Args:
+            catalog: Work catalog the projects were scored against
+            income_categories: Income category of each project
+            scores: Scores of shape (projects, works)
+            grants: Eligible grants of shape (projects, works)
+            rankings: Catalog indices of the ranked works of each project, best first
+        """
+        self.catalog = catalog
+        self.income_categories = income_categories
+        self.scores = scores
+        self.grants = grants
+        self.rankings = rankings
+
+    def __len__(self) -> int:
+        return len(self.rankings)
+
+    def as_payload(self) -> Dict[str, Any]:
+        """
+        Returns the result in the shape served by the batch endpoint.
+
+        The catalog is listed once; each project refers to works by their index in it.
+        """
+        return {
+            "works": self.catalog.as_payload(),
+            "results": [
+                {
+                    "incomeCategory": category,
+                    "ranking": ranking.tolist(),
+                    "scores": scores[ranking].tolist(),
+                    "eligibleGrants": grants[ranking].tolist(),
+                }
+                for category, ranking, scores, grants
+                in zip(self.income_categories, self.rankings, self.scores, self.grants)
+            ],
+        }
+
+
+def prioritize_batch(projects: Sequence[ProjectRequest]) -> BatchResult:
+    """
+    Prioritizes renovation works for many projects at once.
+
+    The projects are encoded as arrays and scored with the same kernels as
+    PrioritizationSystem, so each ranking is identical to a single simulation.
+
+    Args:
+        projects: Renovation project data
+
+    Returns:
+        Scores, eligible grants and rankings of every project
+    """
+    weighting = get_weighting()
+    catalog = get_catalog()
+    tables = get_scoring_tables(catalog, weighting)
+    if not projects:
+        empty = np.zeros((0, len(catalog)), dtype=np.float64)
+        return BatchResult(catalog, [], empty, empty, [])
+
+    data = [project.model_dump() for project in projects]
+    housing = [d['housingData'] for d in data]
+    budget = [d['budgetData'] for d in data]
+
+    surface = np.array([int(h['surface']) for h in housing])
+    floor_number = np.array([int(b['floorNumber']) for b in budget])
+    total_budget = np.array([int(b['totalBudget']) for b in budget])
+    household_income = np.array([int(b['householdIncome']) for b in budget])
+    child_number = [int(b['childNumber']) for b in budget]
+
+    # One row of criterion values per distinct profile
+    profiles: Dict[str, int] = {}
+    profile_codes = [profiles.setdefault(d['profileData'], len(profiles)) for d in data]
+    profile_values = np.stack([tables.criterion_values(PROFILE_FACTORS.get(name, {})) for name in profiles])
+    criterion_values = profile_values[profile_codes]
+
+    scores = base_scores(tables, criterion_values)
+    tables.housing_rules.apply(scores, tables.housing_rules.active_rules(data), criterion_values)
+    apply_budget_adjustments(tables, scores, total_budget, household_income,
+                             np.array([b.get('propertyType') for b in budget], dtype=object),
+                             np.array([b.get('renovationMethod') for b in budget], dtype=object))
+    tables.technical_rules.apply(scores, tables.technical_rules.active_rules(data), criterion_values)
+
+    # Scalar helpers evaluated once per distinct input
+    categories: Dict[tuple, tuple] = {}
+    income_categories = []
+    for key in zip(household_income.tolist(), child_number):
+        if key not in categories:
+            categories[key] = calculate_income_category(*key, weighting.incomes)
+        income_categories.append(categories[key])
+    roofs: Dict[tuple, float] = {}
+    roof_surface = np.empty(len(data), dtype=np.float64)
+    for i, key in enumerate(zip(surface.tolist(), [h['roofType'] for h in housing])):
+        if key not in roofs:
+            roofs[key] = calculate_roof_surface(*key)
+        roof_surface[i] = roofs[key]
+
+    grants = eligible_grants(
+        tables,
+        surface,
+        calculate_wall_surface(surface, floor_number),
+        roof_surface,
+        np.array([multiplier for _, multiplier in income_categories]),
+        np.array([GRANT_CEILINGS.get(category, 0) for category, _ in income_categories]),
+    )
+    rankings = [rank_works(row) for row in scores]
+
+    return BatchResult(catalog, [category for category, _ in income_categories], scores, grants, rankings)
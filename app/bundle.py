@@ -0,0 +1,191 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.pydantic_models import ProjectRequest
+from app.simulation import PrioritizationResult, PrioritizationSystem
+
+# Both bound the solve time whatever the size of the catalog, at the price of an approximate
+# answer once reached: only the best ranked works are candidates, and past the limit the
+# frontier is trimmed after each work
+BUNDLE_MAX_WORKS = int(os.getenv('BUNDLE_MAX_WORKS', '48'))
+BUNDLE_FRONTIER_LIMIT = int(os.getenv('BUNDLE_FRONTIER_LIMIT', '512'))
+
+
+def net_costs(costs: np.ndarray, grants: np.ndarray) -> np.ndarray:
+    """Returns what each work costs the household once its grant is deducted; unknown grants count as none."""
+    return np.maximum(costs - np.nan_to_num(grants), 0)
+
+
+class ParetoFrontier:
+    """
+    Bundles of works that no other bundle beats on both net cost and score.
+
+    Built item by item (Nemhauser-Ullmann): the frontier of the first k works is merged
+    with itself shifted by the cost and score of work k + 1, and dominated bundles are
+    dropped. Each step keeps, for every point, the point it extends and whether it takes
+    the new work, so that any bundle can be rebuilt afterwards.
+    """
+
+    def __init__(self, costs: np.ndarray, scores: np.ndarray, limit: int = BUNDLE_FRONTIER_LIMIT):
+        """
+        Args:
+            costs: Net cost of each work, non-negative
+            scores: Score of each work, positive
+            limit: Maximum number of points kept after each step
+        """
+        self.exact = True
+        self.costs = np.zeros(1)
+        self.scores = np.zeros(1)
+        self._steps: List[Tuple[np.ndarray, np.ndarray]] = []
+        for cost, score in zip(costs.tolist(), scores.tolist()):
+            self._add(cost, score, limit)
+
+    def __len__(self) -> int:
+        return len(self.costs)
+
+    def _add(self, cost: float, score: float, limit: int):
+        # Both the frontier and its shifted copy are sorted by cost: merge them, the shifted
+        # points going first at equal cost
+        size = len(self.costs)
+        points = np.arange(size)
+        shifted = np.searchsorted(self.costs, self.costs + cost) + points
+        taken = np.zeros(2 * size, dtype=bool)
+        taken[shifted] = True
+        kept = ~taken
+        costs = np.empty(2 * size)
+        costs[shifted] = self.costs + cost
+        costs[kept] = self.costs
+        scores = np.empty(2 * size)
+        scores[shifted] = self.scores + score
+        scores[kept] = self.scores
+        parents = np.empty(2 * size, dtype=np.intp)
+        parents[shifted] = points
+        parents[kept] = points
+
+        # A point survives if it beats every cheaper one, and the better of two equal-cost points is the second
+        survivors = np.flatnonzero(scores > np.maximum.accumulate(np.concatenate(([-np.inf], scores[:-1]))))
+        survivors = survivors[np.append(costs[survivors[1:]] != costs[survivors[:-1]], True)]
+
+        if len(survivors) > limit:
+            survivors = self._trim(survivors, costs, limit)
+            self.exact = False
+
+        self.costs = costs[survivors]
+        self.scores = scores[survivors]
+        self._steps.append((parents[survivors], taken[survivors]))
+
+    @staticmethod
+    def _trim(order: np.ndarray, costs: np.ndarray, limit: int) -> np.ndarray:
+        # Frontier scores grow with the cost, so the last point of each cost bucket is its best one.
+        # The cheapest point is always kept, so that any budget the untrimmed frontier fits still fits
+        point_costs = costs[order]
+        buckets = np.floor((point_costs - point_costs[0]) / (point_costs[-1] - point_costs[0]) * max(limit - 2, 0))
+        last_of_bucket = np.append(buckets[1:] != buckets[:-1], True)
+        last_of_bucket[0] = True
+        return order[last_of_bucket]
+
+    def bundles(self, points: np.ndarray) -> np.ndarray:
+        """
+        Rebuilds the bundles of frontier points.
+
+        Args:
+            points: Indices of frontier points
+
+        Returns:
+            Boolean array of shape (points, works), True for the works each bundle takes
+        """
+        chosen = np.zeros((len(points), len(self._steps)), dtype=bool)
+        for work in range(len(self._steps) - 1, -1, -1):
+            parents, taken = self._steps[work]
+            chosen[:, work] = taken[points]
+            points = parents[points]
+        return chosen
+
+    def best_within(self, budget: float) -> int:
+        """
+        Returns the frontier point with the highest score whose net cost fits the budget.
+
+        Returns -1, the empty bundle, when no point fits.
+        """
+        return int(np.searchsorted(self.costs, budget, side="right")) - 1
+
+
+class BundleResult:
+    """Best bundle of works of a project within a budget, and the cost/score frontier it lies on."""
+
+    __slots__ = ("result", "costs", "net_costs", "budget", "candidates", "frontier", "best")
+
+    def __init__(self, result: PrioritizationResult, costs: np.ndarray, budget: float,
+                 max_works: int = BUNDLE_MAX_WORKS):
+        """
+        Args:
+            result: Prioritized works of the project, the candidates of the bundle
+            costs: Estimated cost of each prioritized work, before grants
+            budget: Maximum net cost of the bundle
+            max_works: Number of best ranked works considered
+        """
+        self.result = result
+        self.costs = costs
+        self.net_costs = net_costs(costs, result.grants)
+        self.budget = budget
+        self.candidates = min(len(result), max_works)
+        self.frontier = ParetoFrontier(self.net_costs[:self.candidates], result.scores[:self.candidates])
+        self.best = self.frontier.best_within(budget)
+
+    @property
+    def exact(self) -> bool:
+        """Whether the bundle and the frontier are optimal over every prioritized work."""
+        return self.frontier.exact and self.candidates == len(self.result)
+
+    def as_payload(self) -> Dict[str, Any]:
+        """
+        Returns the result in the shape served by the bundle endpoint.
+
+        The catalog is listed once; bundles refer to works by their index in it, best ranked first.
+        """
+        works = self.result.works[:self.candidates]
+        scores = self.result.scores[:self.candidates]
+        grants = np.nan_to_num(self.result.grants[:self.candidates])
+        chosen = self.frontier.bundles(np.arange(len(self.frontier)))
+        best = chosen[self.best] if self.best >= 0 else np.zeros(self.candidates, dtype=bool)
+        return {
+            "works": self.result.catalog.as_payload(),
+            "budget": self.budget,
+            "exact": self.exact,
+            "bundle": {
+                "works": works[best].tolist(),
+                "score": float(scores[best].sum()),
+                "cost": float(self.costs[:self.candidates][best].sum()),
+                "grants": float(grants[best].sum()),
+                "netCost": float(self.net_costs[:self.candidates][best].sum()),
+            },
+            "frontier": [
+                {"works": works[bundle].tolist(), "score": score, "netCost": cost}
+                for bundle, score, cost in zip(chosen, self.frontier.scores.tolist(), self.frontier.costs.tolist())
+            ],
+        }
+
+
+def optimize_bundle(project: ProjectRequest, budget: Optional[float] = None) -> BundleResult:
+    """
+    Chooses the prioritized works that maximize the total score within a budget.
+
+    The net cost of a work is its estimated cost minus its eligible grant. The exact
+    Pareto frontier of net cost against score is built first; the best bundle is its
+    highest point within the budget. Beyond BUNDLE_MAX_WORKS candidates or
+    BUNDLE_FRONTIER_LIMIT points the result is approximate and flagged as not exact.
+
+    Args:
+        project: Renovation project data
+        budget: Maximum net cost, the project's total budget if None
+
+    Returns:
+        Best bundle and frontier
+    """
+    system = PrioritizationSystem(project)
+    result = system.prioritize()
+    if budget is None:
+        budget = float(int(system.project_data['budgetData']['totalBudget']))
+    return BundleResult(result, system._calculate_costs(result.works), budget)
@@ -0,0 +1,186 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import psycopg
+
+from app.database.calls import fetch_work_list_sync
+from app.database.pool import connection_kwargs
+
+CATALOG_CHANNEL = "work_list_changed"
+CATALOG_COLUMNS = ["Type", "Description", "Estimated Grant", "Grant by surface?", "Estimated Cost", "Cost by surface?"]
+
+
+class WorkCatalog:
+    """Immutable, columnar snapshot of the work_list table."""
+
+    __slots__ = ("rows", "version", "types", "descriptions", "estimated_grant", "grant_by_surface",
+                 "estimated_cost", "cost_by_surface", "_payload")
+
+    def __init__(self, rows: Sequence[Tuple], version: int):
+        """
+        Builds the column arrays once so that simulations only read them.
+
+        Args:
+            rows: (genre, description, estimated_prime, is_prime_by_surface, estimated_cost, is_cost_by_surface) tuples
+            version: Monotonic version of the catalog, bumped whenever its content changes
+        """
+        self.rows = tuple(tuple(row) for row in rows)
+        self.version = version
+        columns = list(zip(*self.rows)) if self.rows else [()] * len(CATALOG_COLUMNS)
+        self.types = self._frozen(np.array(columns[0], dtype=object))
+        self.descriptions = self._frozen(np.array(columns[1], dtype=object))
+        self.estimated_grant = self._frozen(np.array([np.nan if v is None else v for v in columns[2]], dtype=np.float64))
+        self.grant_by_surface = self._frozen(np.array(columns[3], dtype=bool))
+        self.estimated_cost = self._frozen(np.array(columns[4], dtype=np.float64))
+        self.cost_by_surface = self._frozen(np.array(columns[5], dtype=bool))
+        self._payload: Optional[List[Dict[str, Any]]] = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @staticmethod
+    def _frozen(array: np.ndarray) -> np.ndarray:
+        array.flags.writeable = False
+        return array
+
+    def as_payload(self) -> List[Dict[str, Any]]:
+        """
+        Returns the works in the shape listed by the endpoints that refer to them by index.
+
+        Built once per snapshot and shared by every response: callers must not modify it.
+        """
+        if self._payload is None:
+            self._payload = [dict(zip(CATALOG_COLUMNS, row)) for row in self.rows]
+        return self._payload
+
+    def to_dataframe(self):
+        """
+        Returns the catalog as a pandas DataFrame, for analytics only.
+
+        Returns:
+            DataFrame with one row per work
+        """
+        import pandas as pd
+
+        return pd.DataFrame(list(self.rows), columns=CATALOG_COLUMNS)
+
+
+class WorkCatalogCache:
+    """Process-wide holder of the current work catalog snapshot."""
+
+    def __init__(self, loader=fetch_work_list_sync):
+        self._loader = loader
+        self._catalog: Optional[WorkCatalog] = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._catalog is not None
+
+    def get(self) -> WorkCatalog:
+        """Returns the current snapshot, loading it from the database on first use."""
+        catalog = self._catalog
+        if catalog is None:
+            catalog = self.refresh()
+        return catalog
+
+    def refresh(self) -> WorkCatalog:
+        """Reloads the catalog from the database."""
+        return self.load(self._loader())
+
+    def load(self, rows: Sequence[Tuple]) -> WorkCatalog:
+        """
+        Replaces the snapshot with the given rows, bumping the version only if they changed.
+
+        Args:
+            rows: Work catalog rows, in table order
+
+        Returns:
+            The current snapshot
+        """
+        rows = tuple(tuple(row) for row in rows)
+        with self._lock:
+            if self._catalog is None or self._catalog.rows != rows:
+                self._version += 1
+                self._catalog = WorkCatalog(rows, self._version)
+                logging.info("Work catalog loaded: %d works, version %d", len(rows), self._version)
+            return self._catalog
+
+
+class CatalogListener(threading.Thread):
+    """Background thread reloading the catalog whenever work_list is modified."""
+
+    def __init__(self, cache: WorkCatalogCache, retry_delay: float = 5.0):
+        super().__init__(name="work-catalog-listener", daemon=True)
+        self.cache = cache
+        self.retry_delay = retry_delay
+        self._stopping = threading.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    def run(self):
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = psycopg.connect(autocommit=True, **connection_kwargs())
+                conn.execute(f"LISTEN {CATALOG_CHANNEL}")
+                # Catch up on changes made before LISTEN took effect or while disconnected
+                self.cache.load(fetch_work_list_sync(conn))
+                self._listen(conn)
+            except psycopg.Error as e:
+                logging.error("Work catalog listener failed: %s", str(e))
+                self._stopping.wait(self.retry_delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _listen(self, conn):
+        while not self._stopping.is_set():
+            # Wake up every second to notice stop(); notifications received together are handled once
+            if any(True for _ in conn.notifies(timeout=1.0, stop_after=1)):
+                self.cache.load(fetch_work_list_sync(conn))
+
+
+_cache = WorkCatalogCache()
+_listener: Optional[CatalogListener] = None
+
+
+def get_catalog() -> WorkCatalog:
+    """Returns the current work catalog snapshot."""
+    return _cache.get()
+
+
+def is_catalog_loaded() -> bool:
+    """Whether a catalog snapshot exists in this process, e.g. inherited from the master."""
+    return _cache.loaded
+
+
+def refresh_catalog() -> WorkCatalog:
+    """Forces a reload of the work catalog from the database."""
+    return _cache.refresh()
+
+
+def load_catalog(rows: List[Tuple]) -> WorkCatalog:
+    """Installs the given rows as the work catalog without touching the database."""
+    return _cache.load(rows)
+
+
+def start_catalog_listener():
+    """Starts listening for work_list change notifications."""
+    global _listener
+    if _listener is None:
+        _listener = CatalogListener(_cache)
+        _listener.start()
+
+
+def stop_catalog_listener():
+    """Stops the change notification listener."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener.join(timeout=5)
+        _listener = None
@@ -1,28 +1,128 @@
-import logging
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
 
-import psycopg2
-from fastapi import Depends, HTTPException
-from starlette import status
+from fastapi import Depends
+from psycopg import sql
 
-from app.auth import verify_token
-from app.database.config import load_config
+from app.auth import verify_token, invalidate_owner
+from app.database.pool import get_connection, get_sync_connection
 from app.pydantic_models import ProjectRequest
 
-config = load_config()
-
-def retrieve_owner(payload: dict = Depends(verify_token)):
-    email = payload.get("sub")
-    with psycopg2.connect(**config) as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT id FROM Owner WHERE email = %s", (email,))
-            owner = cur.fetchone()
-            if not owner:
-                logging.error("Owner not found for email: %s", email)
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Owner not found."
-                )
-            return owner[0]
+# Columns a project listing may return, in their default order
+PROJECT_FIELDS = ("id", "name", "description", "details")
+
+# details is read as JSON text, so it can be passed on to clients without being decoded
+_PROJECT_COLUMNS = {field: sql.Identifier(field) for field in PROJECT_FIELDS}
+_PROJECT_COLUMNS["details"] = sql.SQL("details::text")
+
+WORK_LIST_QUERY = """
+    SELECT genre, description, estimated_prime, is_prime_by_surface, estimated_cost, is_cost_by_surface
+    FROM work_list ORDER BY id
+"""
+
+async def retrieve_owner(payload: dict = Depends(verify_token)):
+    # verify_token has already checked that the owner of the token still exists
+    return payload["uid"]
 
 def insert_project(project_data: ProjectRequest):
-    pass
\ No newline at end of file
+    pass
+
+async def insert_owner(email: str, hashed_password: str, name: str, firstname: str) -> bool:
+    """Creates an owner account. Returns False if the e-mail is already registered."""
+    async with get_connection() as conn:
+        cur = await conn.execute("""
+                                 INSERT INTO Owner (email, password, name, firstname) VALUES (%s, %s, %s, %s)
+                                 ON CONFLICT (email) DO NOTHING RETURNING id
+                                 """, (email, hashed_password, name, firstname))
+        return await cur.fetchone() is not None
+
+async def delete_owner(owner_id: int):
+    """Deletes an owner account and forgets it in the token validation cache."""
+    async with get_connection() as conn:
+        await conn.execute("DELETE FROM Owner WHERE id = %s", (owner_id,))
+    invalidate_owner(owner_id)
+
+def _projects_query(fields: Sequence[str], limit: Optional[int]) -> sql.Composed:
+    # Keyset pagination: the next page starts after the last id served, using the primary key order
+    query = sql.SQL("SELECT {} FROM test WHERE owner_id = %s AND id > %s ORDER BY id").format(
+        sql.SQL(", ").join(_PROJECT_COLUMNS[field] for field in fields)
+    )
+    if limit is not None:
+        query += sql.SQL(" LIMIT {}").format(sql.Literal(limit))
+    return query
+
+async def fetch_projects(owner_id: int, fields: Sequence[str] = PROJECT_FIELDS, after: int = 0,
+                         limit: Optional[int] = None) -> List[Tuple]:
+    """
+    Returns a page of the projects of an owner, in id order.
+
+    Args:
+        owner_id: Owner of the projects
+        fields: Columns to select, among PROJECT_FIELDS
+        after: Only projects with a greater id are returned
+        limit: Maximum number of rows, unlimited if None
+    """
+    async with get_connection() as conn:
+        cur = await conn.execute(_projects_query(fields, limit), (owner_id, after))
+        return await cur.fetchall()
+
+async def stream_projects(owner_id: int, fields: Sequence[str] = PROJECT_FIELDS, after: int = 0,
+                          limit: Optional[int] = None, batch_size: int = 200) -> AsyncIterator[Tuple]:
+    """
+    Yields the projects of an owner through a server-side cursor, ``batch_size`` rows at a time.
+
+    The connection stays checked out until the iteration ends.
+    """
+    async with get_connection() as conn:
+        async with conn.cursor(name="stream_projects") as cur:
+            cur.itersize = batch_size
+            await cur.execute(_projects_query(fields, limit), (owner_id, after))
+            async for row in cur:
+                yield row
+
+async def fetch_project(project_id: int) -> Optional[Tuple]:
+    """Returns (id, name, description, owner_id, details as JSON text) of a project, or None if it does not exist."""
+    async with get_connection() as conn:
+        cur = await conn.execute("""
+                                 SELECT id, name, description, owner_id, details::text FROM test WHERE id = %s
+                                 """, (project_id,))
+        return await cur.fetchone()
+
+async def save_project(name: str, description: str, details: bytes, owner_id: int, request: str):
+    """
+    Stores a project with its simulation result, given as serialized JSON.
+
+    The request is kept as well, so that the result can be computed again when the weighting changes.
+    """
+    async with get_connection() as conn:
+        await conn.execute("""
+                           INSERT INTO test (name, description, details, owner_id, request)
+                           VALUES (%s, %s, %s::jsonb, %s, %s::jsonb)
+                           """, (name, description, details.decode(), owner_id, request))
+
+async def fetch_rescoring_job() -> Optional[Tuple]:
+    """Returns the most recent re-scoring job, or None if none was ever started."""
+    async with get_connection() as conn:
+        cur = await conn.execute("""
+                                 SELECT id, status, total, processed, failed, skipped, last_id, error,
+                                        started_at, updated_at, finished_at
+                                 FROM rescoring_job ORDER BY id DESC LIMIT 1
+                                 """)
+        return await cur.fetchone()
+
+async def fetch_work_list() -> list:
+    """Returns every row of the work catalog, in table order."""
+    async with get_connection() as conn:
+        cur = await conn.execute(WORK_LIST_QUERY)
+        return await cur.fetchall()
+
+def fetch_work_list_sync(conn=None) -> list:
+    """
+    Blocking variant of fetch_work_list, for background threads and scripts.
+
+    Args:
+        conn: Open psycopg connection to use; a dedicated one is opened if omitted
+    """
+    if conn is None:
+        with get_sync_connection() as conn:
+            return conn.execute(WORK_LIST_QUERY).fetchall()
+    return conn.execute(WORK_LIST_QUERY).fetchall()
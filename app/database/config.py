@@ -8,8 +8,11 @@ filename = os.getenv('CONFIG_FILE')
 
 import os
 from configparser import ConfigParser # Assuming you are using configparser for .ini files
+from functools import lru_cache
 
+@lru_cache(maxsize=None)
 def load_config(section='postgresql'):
+    # Parsed once per process: callers share the returned dict and must not mutate it
     parser = ConfigParser()
     parser.read(filename)
 
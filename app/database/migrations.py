@@ -0,0 +1,228 @@
+import logging
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import psycopg
+from psycopg import sql
+
+from app.database.pool import get_sync_connection
+
+# Arbitrary key of the advisory lock serializing concurrent migration runs (e.g. several workers booting)
+MIGRATION_LOCK_KEY = 7342001
+
+
+# Initial rows of the work catalog, in table order; also loaded by the benchmarks and tests, without a database
+SEED_WORKS: Tuple[Tuple, ...] = (
+    ('Toiture', 'Remplacement de la couverture', 4.0, True, 70.0, True),
+    ('Toiture', 'Appropriation de la charpente', 100.0, False, 95.0, True),
+    ('Toiture', 'Isolation thermique du toit ou des combles', 20.0, True, 40.0, True),
+    ('Murs', 'Isolation thermique des murs', 8.8, True, 125.0, True),
+    ('Sols', 'Isolation thermique des sols', 6.0, True, 35.0, True),
+    ('Menuiseries et Vitrage', 'Remplacement des menuiseries extérieures ou revitrage', 26.0, True, 100.0, True),
+    ('Chauffage', 'Pompe à chaleur', 600.0, False, 10000.0, False),
+    ('Chauffage', 'Chaudière biomasse', 720.0, False, 12500.0, False),
+    ('Chauffage', 'Thermostat Programmable', 16.0, False, 100.0, False),
+    ('Eau chaude', 'Pompe à chaleur', 280.0, False, 7500.0, False),
+    ('Eau chaude', 'Chauffe-eau solaire', 420.0, False, 5000.0, False),
+    ('Energie', 'Installation de panneaux photovoltaïques', 0.0, False, 7000.0, False),
+    ('Ventilation', 'Ventilation double flux avec échangeur thermique', 680.0, False, 5500.0, False),
+)
+
+
+def _sql_rows(rows: Sequence[Tuple]) -> str:
+    """Renders rows as the body of a VALUES clause."""
+    return ",\n            ".join(
+        sql.SQL("({})").format(sql.SQL(", ").join(map(sql.Literal, row))).as_string(None) for row in rows
+    )
+
+
+class Migration(NamedTuple):
+    """A numbered schema change, applied once in its own transaction."""
+    version: int
+    description: str
+    commands: Tuple[str, ...]
+
+
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(1, "Create tables", (
+        """
+        CREATE TABLE IF NOT EXISTS Owner (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(50) NOT NULL,
+            firstname VARCHAR(50) NOT NULL,
+            email VARCHAR(255) NOT NULL UNIQUE,
+            password VARCHAR(255) NOT NULL,
+            is_admin BOOLEAN NOT NULL DEFAULT FALSE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Home (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(50) NOT NULL,
+            description TEXT NOT NULL,
+            profile VARCHAR(50) NOT NULL,
+            region VARCHAR(255) NOT NULL,
+            construction_year VARCHAR(50) NULL,
+            surface VARCHAR(50) NOT NULL,
+            roof_type VARCHAR(50) NOT NULL,
+            housing_type VARCHAR(50) NOT NULL,
+            peb_label VARCHAR(1) NULL,
+            heating_type VARCHAR(50) NOT NULL,
+            average_temp VARCHAR(50) NOT NULL,
+            programmable_thermostat VARCHAR(50) NOT NULL,
+            windows_type VARCHAR(50) NOT NULL,
+            wall_insulation VARCHAR(50) NOT NULL,
+            roof_insulation VARCHAR(50) NOT NULL,
+            floor_insulation VARCHAR(50) NOT NULL,
+            house_income VARCHAR(50) NOT NULL,
+            child_number VARCHAR(50) NOT NULL,
+            renovation_method VARCHAR(50) NOT NULL,
+            floor_number VARCHAR(50) NOT NULL,
+            has_solar_panels VARCHAR(50) NOT NULL,
+            has_water_heater VARCHAR(50) NOT NULL,
+            boiler_type VARCHAR(50) NOT NULL,
+            ventilation_type VARCHAR(50) NOT NULL,
+            onwer_id INT NOT NULL,
+            FOREIGN KEY (onwer_id) REFERENCES Owner (id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Simulation (
+            id SERIAL PRIMARY KEY,
+            date VARCHAR(50) NOT NULL,
+            details JSONB,
+            home_id INT NOT NULL,
+            FOREIGN KEY (home_id) REFERENCES Home (id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Work_list (
+            id SERIAL PRIMARY KEY,
+            genre VARCHAR(50) NOT NULL,
+            description TEXT NOT NULL,
+            estimated_prime FLOAT NULL,
+            is_prime_by_surface BOOLEAN NOT NULL,
+            estimated_cost FLOAT NOT NULL,
+            is_cost_by_surface BOOLEAN NOT NULL,
+            UNIQUE(genre, description)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Test (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(50) NOT NULL,
+            description TEXT NOT NULL,
+            owner_id INT NOT NULL,
+            details JSONB,
+            FOREIGN KEY (owner_id) REFERENCES Owner (id) ON DELETE CASCADE
+        )
+        """,
+    )),
+    Migration(2, "Seed the work catalog", (
+        f"""
+        INSERT INTO Work_list
+            (genre, description, estimated_prime, is_prime_by_surface, estimated_cost, is_cost_by_surface)
+        VALUES
+            {_sql_rows(SEED_WORKS)}
+        ON CONFLICT (genre, description) DO NOTHING
+        """,
+    )),
+    Migration(3, "Notify work_list changes", (
+        """
+        CREATE OR REPLACE FUNCTION notify_work_list_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('work_list_changed', TG_OP);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        DROP TRIGGER IF EXISTS work_list_changed ON Work_list
+        """,
+        """
+        CREATE TRIGGER work_list_changed
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Work_list
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_work_list_changed()
+        """,
+    )),
+    Migration(4, "Index the columns project and home listings filter on", (
+        # Matches the keyset pagination of the project listing: WHERE owner_id = ? AND id > ? ORDER BY id
+        "CREATE INDEX IF NOT EXISTS test_owner_id_idx ON Test (owner_id, id)",
+        "CREATE INDEX IF NOT EXISTS simulation_home_id_idx ON Simulation (home_id)",
+        "CREATE INDEX IF NOT EXISTS home_onwer_id_idx ON Home (onwer_id)",
+    )),
+    Migration(5, "Store project inputs and track re-scoring jobs", (
+        # Projects saved before this column existed cannot be re-scored
+        "ALTER TABLE Test ADD COLUMN IF NOT EXISTS request JSONB",
+        """
+        CREATE TABLE IF NOT EXISTS Rescoring_job (
+            id SERIAL PRIMARY KEY,
+            status VARCHAR(20) NOT NULL,
+            total INT NOT NULL,
+            processed INT NOT NULL DEFAULT 0,
+            failed INT NOT NULL DEFAULT 0,
+            skipped INT NOT NULL,
+            last_id INT NOT NULL DEFAULT 0,
+            error TEXT NULL,
+            started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            finished_at TIMESTAMPTZ NULL,
+            catalog_version TEXT NULL,
+            weighting_version TEXT NULL
+        )
+        """,
+    )),
+)
+
+
+def applied_versions(conn: psycopg.Connection) -> set:
+    """Returns the versions already recorded in schema_version."""
+    return {row[0] for row in conn.execute("SELECT version FROM schema_version")}
+
+
+def migrate(migrations: Sequence[Migration] = MIGRATIONS, target: Optional[int] = None) -> list:
+    """
+    Applies the migrations that are not recorded in schema_version yet.
+
+    Each migration runs in its own transaction together with its schema_version row,
+    so a failure leaves the database at the last completed step. The first steps only
+    use IF NOT EXISTS / ON CONFLICT statements, so databases created before
+    schema_version existed are adopted as they are.
+
+    Args:
+        migrations: Migrations in ascending version order
+        target: Highest version to apply, all of them if None
+
+    Returns:
+        Versions applied by this call
+    """
+    applied = []
+    with get_sync_connection(autocommit=True) as conn:
+        # Locked first: IF NOT EXISTS does not stop two concurrent creations from colliding in the catalog
+        conn.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+        try:
+            conn.execute("""
+                         CREATE TABLE IF NOT EXISTS schema_version (
+                             version INT PRIMARY KEY,
+                             description TEXT NOT NULL,
+                             applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                         )
+                         """)
+            done = applied_versions(conn)
+            for migration in migrations:
+                if migration.version in done or (target is not None and migration.version > target):
+                    continue
+                with conn.transaction():
+                    for command in migration.commands:
+                        conn.execute(command)
+                    conn.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                                 (migration.version, migration.description))
+                logging.info("Applied migration %d: %s", migration.version, migration.description)
+                applied.append(migration.version)
+        finally:
+            conn.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+    return applied
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"Applied migrations: {migrate() or 'none'}")
@@ -0,0 +1,181 @@
+import asyncio
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+import psycopg
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+
+from app.database.config import load_config
+from app.metrics import POOL_CAPACITY, POOL_IN_USE, POOL_TIMEOUTS, POOL_WAITING, record_query
+
+POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+POOL_HEALTH_CHECK_INTERVAL = float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', '30'))
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be checked out before the timeout."""
+
+
+def connection_kwargs() -> dict:
+    """
+    Returns the psycopg connection parameters of the configuration file.
+
+    libpq calls the database ``dbname``; the ``database`` key of the file is renamed accordingly.
+    """
+    kwargs = dict(load_config())
+    if 'database' in kwargs:
+        kwargs['dbname'] = kwargs.pop('database')
+    return kwargs
+
+
+class InstrumentedCursor(psycopg.AsyncCursor):
+    """Cursor adding the duration of each statement to the metrics of the current request."""
+
+    async def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            record_query(time.perf_counter() - started)
+
+    async def executemany(self, query, params_seq, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().executemany(query, params_seq, **kwargs)
+        finally:
+            record_query(time.perf_counter() - started)
+
+
+class ConnectionPool:
+    """Asynchronous pool of PostgreSQL connections shared by the request handlers."""
+
+    def __init__(self, kwargs: dict, min_size: int = POOL_MIN_SIZE, max_size: int = POOL_MAX_SIZE,
+                 timeout: float = POOL_TIMEOUT, health_check_interval: float = POOL_HEALTH_CHECK_INTERVAL):
+        """
+        Args:
+            kwargs: psycopg connection parameters
+            min_size: Number of connections kept open
+            max_size: Maximum number of connections checked out at once
+            timeout: Seconds to wait for a free connection before giving up
+            health_check_interval: Idle seconds after which a connection is pinged before reuse
+        """
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._last_used = weakref.WeakKeyDictionary()
+        self.max_size = max_size
+        self._pool = AsyncConnectionPool(
+            kwargs={**kwargs, "cursor_factory": InstrumentedCursor},
+            min_size=min_size,
+            max_size=max_size,
+            timeout=timeout,
+            check=self._check,
+            reset=self._mark_used,
+            open=False,
+            name="app",
+        )
+
+    async def open(self):
+        """Opens the pool and waits for ``min_size`` connections to be ready."""
+        await self._pool.open(wait=True, timeout=self.timeout)
+        POOL_CAPACITY.inc(self.max_size)
+
+    async def close(self):
+        """Closes every connection of the pool."""
+        await self._pool.close()
+        POOL_CAPACITY.dec(self.max_size)
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Borrows a connection for the duration of a transaction.
+
+        The transaction is committed when the block exits normally and rolled back
+        when it raises, then the connection goes back to the pool.
+        """
+        waiting = True
+        POOL_WAITING.inc()
+        try:
+            async with self._pool.connection() as conn:
+                POOL_WAITING.dec()
+                waiting = False
+                POOL_IN_USE.inc()
+                try:
+                    yield conn
+                finally:
+                    POOL_IN_USE.dec()
+        except PoolTimeout as e:
+            POOL_TIMEOUTS.inc()
+            raise PoolTimeoutError(f"No database connection available after {self.timeout}s") from e
+        finally:
+            if waiting:
+                POOL_WAITING.dec()
+
+    def stats(self) -> dict:
+        """Returns the pool counters reported by psycopg_pool."""
+        return self._pool.get_stats()
+
+    async def _check(self, conn: psycopg.AsyncConnection):
+        # Connections used recently are trusted; the others are pinged before reuse
+        last_used = self._last_used.get(conn)
+        if last_used is not None and time.monotonic() - last_used < self.health_check_interval:
+            return
+        await AsyncConnectionPool.check_connection(conn)
+
+    async def _mark_used(self, conn: psycopg.AsyncConnection):
+        self._last_used[conn] = time.monotonic()
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock: Optional[asyncio.Lock] = None
+
+
+async def open_pool() -> ConnectionPool:
+    """Returns the process-wide pool, opening it on first use."""
+    global _pool, _pool_lock
+    if _pool is None:
+        if _pool_lock is None:
+            _pool_lock = asyncio.Lock()
+        async with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool(connection_kwargs())
+                await pool.open()
+                _pool = pool
+    return _pool
+
+
+async def close_pool():
+    """Closes the process-wide pool if it has been opened."""
+    global _pool, _pool_lock
+    if _pool is not None:
+        pool, _pool, _pool_lock = _pool, None, None
+        await pool.close()
+
+
+@asynccontextmanager
+async def get_connection():
+    """
+    Borrows a pooled connection for the duration of a transaction.
+
+    Raises:
+        PoolTimeoutError: If no connection is available before the pool timeout
+    """
+    pool = await open_pool()
+    async with pool.connection() as conn:
+        yield conn
+
+
+@contextmanager
+def get_sync_connection(autocommit: bool = False):
+    """
+    Opens a dedicated blocking connection, for scripts and background threads.
+
+    Without ``autocommit``, the transaction is committed when the block exits normally
+    and rolled back when it raises. The connection is closed afterwards.
+    """
+    with psycopg.connect(autocommit=autocommit, **connection_kwargs()) as conn:
+        yield conn
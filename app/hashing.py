@@ -0,0 +1,114 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.metrics import HASH_PENDING, HASH_QUEUE_DEPTH, HASH_REJECTED
+
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+HASH_QUEUE_LIMIT = int(os.getenv('HASH_QUEUE_LIMIT', '16'))
+
+# Hashes made with another cost than BCRYPT_ROUNDS are reported as needing an update,
+# so changing the cost rehashes each password at its owner's next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+class HashingOverloadedError(Exception):
+    """Raised when too many password hashes are already running or waiting."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, size-limited thread pool.
+
+    bcrypt releases the GIL, so the event loop and the request threadpool stay
+    responsive during a burst of logins. Requests beyond the workers plus the
+    queue limit are rejected at once instead of piling up.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, queue_limit: int = HASH_QUEUE_LIMIT):
+        """
+        Args:
+            workers: Number of hashing threads
+            queue_limit: Number of hashes allowed to wait for a free thread
+        """
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of hashes running or waiting."""
+        return self._pending
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of hashes waiting for a free thread."""
+        return max(0, self._pending - self.workers)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.workers + self.queue_limit:
+                HASH_REJECTED.inc()
+                raise HashingOverloadedError(f"{self._pending} password hashes already pending")
+            self._pending += 1
+            self._report()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._report()
+
+    def _report(self):
+        HASH_PENDING.set(self._pending)
+        HASH_QUEUE_DEPTH.set(self.queue_depth)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hashes a password with the configured cost.
+
+        Raises:
+            HashingOverloadedError: If the queue is full
+        """
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Checks a password against its hash.
+
+        Returns:
+            Whether the password matches, and a new hash if the stored one uses another cost
+
+        Raises:
+            HashingOverloadedError: If the queue is full
+        """
+        return await self._run(pwd_context.verify_and_update, password, hashed_password)
+
+    def shutdown(self):
+        """Stops the hashing threads once the running hashes are done."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher()
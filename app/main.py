@@ -1,19 +1,77 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from app.responses import ORJSONResponse
+from starlette import status
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
 
+from app.catalog import is_catalog_loaded, load_catalog, start_catalog_listener, stop_catalog_listener
+from app.database.calls import fetch_work_list
+from app.database.pool import open_pool, close_pool, PoolTimeoutError
+from app.hashing import password_hasher, HashingOverloadedError
+from app.metrics import MetricsMiddleware
+from app.profiling import ProfilingMiddleware
+from app.rescoring import stop_rescoring
 from app.router import router
+from app.warmup import warm_up, set_ready
+from app.weighting_registry import start_weighting_watcher, stop_weighting_watcher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_pool()
+    # Workers forked from a preloaded master already hold the catalog
+    if not is_catalog_loaded():
+        load_catalog(await fetch_work_list())
+    warm_up()
+    start_catalog_listener()
+    start_weighting_watcher()
+    set_ready(True)
+    yield
+    # Fail readiness first so that the load balancer stops routing to this worker
+    set_ready(False)
+    # The job checkpoints every chunk, so the next start resumes it
+    await run_in_threadpool(stop_rescoring)
+    stop_weighting_watcher()
+    stop_catalog_listener()
+    password_hasher.shutdown()
+    await close_pool()
 
 
+ALLOWED_ORIGINS = ["https://apppriorisation-production.up.railway.app"]
+
 middleware = [
+    Middleware(MetricsMiddleware, timing_allow_origins=ALLOWED_ORIGINS),
     Middleware(
         CORSMiddleware,
-        allow_origins=["https://apppriorisation-production.up.railway.app"],
+        allow_origins=ALLOWED_ORIGINS,
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
-    )
+        expose_headers=["X-Next-Cursor", "Server-Timing", "X-Profile-Status"],
+    ),
+    Middleware(ProfilingMiddleware),
 ]
-app = FastAPI(middleware=middleware)
+# orjson renders every JSON response; NaN and infinite floats of the simulation output become null
+app = FastAPI(middleware=middleware, lifespan=lifespan, default_response_class=ORJSONResponse)
+
+app.include_router(router=router)
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    return ORJSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Base de données momentanément indisponible"},
+    )
+
 
-app.include_router(router=router)
\ No newline at end of file
+@app.exception_handler(HashingOverloadedError)
+async def hashing_overloaded_handler(request: Request, exc: HashingOverloadedError):
+    return ORJSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Trop de connexions simultanées, réessayez dans un instant"},
+        headers={"Retry-After": "1"},
+    )
\ No newline at end of file
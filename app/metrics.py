@@ -0,0 +1,172 @@
+import functools
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, \
+    generate_latest, multiprocess
+
+# Set by gunicorn.conf.py: every worker then writes its samples to this directory and
+# a scrape of any worker returns the sum over all of them.
+MULTIPROCESS = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latency of HTTP requests, per route template",
+    ["method", "route", "status"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "Number of SQL statements run by a request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "Time a request spent waiting on SQL statements", ["route"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+POOL_CAPACITY = Gauge("db_pool_max_size", "Maximum size of the connection pools", multiprocess_mode="livesum")
+POOL_IN_USE = Gauge("db_pool_connections_in_use", "Connections currently checked out", multiprocess_mode="livesum")
+POOL_WAITING = Gauge("db_pool_requests_waiting", "Requests waiting for a connection", multiprocess_mode="livesum")
+POOL_TIMEOUTS = Counter("db_pool_timeouts", "Checkouts that gave up after the pool timeout")
+HASH_PENDING = Gauge("bcrypt_pending", "Password hashes running or waiting for a thread", multiprocess_mode="livesum")
+HASH_QUEUE_DEPTH = Gauge("bcrypt_queue_depth", "Password hashes waiting for a thread", multiprocess_mode="livesum")
+HASH_REJECTED = Counter("bcrypt_rejected", "Password hashes rejected because the queue was full")
+SIMULATION_STAGE = Histogram(
+    "simulation_stage_duration_seconds", "Duration of each stage of PrioritizationSystem.prioritize", ["stage"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01),
+)
+
+SIMULATION_STAGES = ("base_scores", "housing_adjustments", "budget_adjustments", "technical_adjustments",
+                     "ranking", "eligible_grants")
+_stage_histograms = {stage: SIMULATION_STAGE.labels(stage) for stage in SIMULATION_STAGES}
+
+
+# Order of the phases in the Server-Timing header; "db" overlaps the others
+SERVER_TIMING_PHASES = ("auth", "db", "scoring", "serialization")
+
+
+class RequestStats:
+    """Database work and time per phase of the current request."""
+
+    __slots__ = ("queries", "db_seconds", "timings")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.timings: Dict[str, float] = {}
+
+    def server_timing(self, total: float) -> bytes:
+        """Returns the value of the Server-Timing header, durations in milliseconds."""
+        timings = {**self.timings, "db": self.db_seconds}
+        entries = [f"{phase};dur={timings[phase] * 1000:.2f}" for phase in SERVER_TIMING_PHASES
+                   if timings.get(phase)]
+        entries.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(entries).encode()
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def record_query(seconds: float):
+    """Adds one SQL statement to the statistics of the current request, if any."""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += seconds
+
+
+@contextmanager
+def request_timer(phase: str):
+    """Adds the duration of the block to a phase of the current request, if any."""
+    stats = _request_stats.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.timings[phase] = stats.timings.get(phase, 0.0) + time.perf_counter() - started
+
+
+def timed(phase: str):
+    """Decorator adding the duration of each call of a coroutine function to a phase of the current request."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with request_timer(phase):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Observes the duration of the block in the histogram of a simulation stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_histograms[stage].observe(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency and database work of every HTTP request.
+
+    Each response also carries a Server-Timing header splitting its time into
+    auth, db, scoring and serialization, which browser developer tools display.
+    """
+
+    def __init__(self, app, timing_allow_origins: Optional[List[str]] = None):
+        """
+        Args:
+            app: ASGI application
+            timing_allow_origins: Origins whose scripts may read the Server-Timing values
+        """
+        self.app = app
+        self.timing_allow_origin = " ".join(timing_allow_origins).encode() if timing_allow_origins else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing(time.perf_counter() - started)))
+                if self.timing_allow_origin:
+                    headers.append((b"timing-allow-origin", self.timing_allow_origin))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The route template, not the raw path, keeps the number of series bounded
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], path, str(status_code)).observe(time.perf_counter() - started)
+            DB_QUERIES_PER_REQUEST.labels(path).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(path).observe(stats.db_seconds)
+            _request_stats.reset(token)
+
+
+def render_metrics() -> bytes:
+    """Returns every metric in the Prometheus text exposition format."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
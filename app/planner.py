@@ -0,0 +1,244 @@
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.bundle import net_costs
+from app.pydantic_models import ProjectRequest
+from app.simulation import PrioritizationResult, PrioritizationSystem
+
+PLAN_BEAM_WIDTH = int(os.getenv('PLAN_BEAM_WIDTH', '256'))
+# Works are tracked as bits of a 64-bit mask
+PLAN_MAX_WORKS = min(64, int(os.getenv('PLAN_MAX_WORKS', '64')))
+
+# Works whose benefit grows with the insulation done before them
+HEATING_TYPES = ("Chauffage",)
+
+
+class RenovationPlanner:
+    """
+    Orders works over a horizon of years, each year's net cost fitting the annual budget.
+
+    A work done in year t (0 being the first) is worth its score for each of the
+    remaining years, so earlier is better. The score of a heating work is multiplied
+    by the energy impact (energy_impact.json) of every insulation work done before it.
+
+    The search is a beam search over actions, vectorized over the beam: do a work in
+    the current year if it fits the remaining budget, or move on to the next year.
+    States with the same works done, year and remaining budget are merged, keeping
+    the most valuable one; the beam then keeps the states with the best value plus an
+    optimistic estimate of what the remaining works can still bring.
+    """
+
+    def __init__(self, costs: np.ndarray, scores: np.ndarray, impacts: np.ndarray, heating: np.ndarray,
+                 annual_budget: float, years: int, beam_width: int = PLAN_BEAM_WIDTH):
+        """
+        Args:
+            costs: Net cost of each work
+            scores: Score of each work
+            impacts: Energy impact multiplier of each work, 1 for works that are not insulation
+            heating: Whether each work is a heating work
+            annual_budget: Net cost allowed per year
+            years: Length of the horizon
+            beam_width: Number of states kept after each action
+        """
+        if len(costs) > PLAN_MAX_WORKS:
+            raise ValueError(f"Trop de travaux à planifier : {PLAN_MAX_WORKS} au maximum")
+        self.costs = costs
+        self.scores = scores
+        self.impacts = impacts
+        self.heating = heating
+        self.annual_budget = annual_budget
+        self.years = years
+        self.beam_width = beam_width
+        self.exact = True
+
+    def solve(self) -> Tuple[np.ndarray, np.ndarray, float]:
+        """
+        Searches the best schedule.
+
+        Returns:
+            Year of each work (-1 if not scheduled), the scheduled works in execution order
+            and the value of the schedule
+        """
+        n = len(self.costs)
+        bits = np.left_shift(np.uint64(1), np.arange(n, dtype=np.uint64))
+        # Upper bound of the value of a work done at the start of a year
+        potential = self.scores * np.where(self.heating, self.impacts.prod(), 1)
+
+        mask = np.zeros(1, dtype=np.uint64)
+        year = np.zeros(1, dtype=np.intp)
+        left = np.full(1, float(self.annual_budget))
+        value = np.zeros(1)
+        boost = np.ones(1)
+        history: List[Tuple[np.ndarray, np.ndarray]] = []
+        best_value, best_state = 0.0, (-1, 0)
+
+        while len(mask):
+            done = (mask[:, None] & bits) != 0
+            fits = ~done & (self.costs <= left[:, None])
+            states, works = np.nonzero(fits)
+            remaining_elsewhere = (~done & ~fits).any(axis=1)
+            # Moving on only helps when a remaining work needs a fresh budget
+            closing = np.flatnonzero(remaining_elsewhere & (year + 1 < self.years))
+
+            gain = self.scores[works] * (self.years - year[states]) * np.where(self.heating[works], boost[states], 1)
+            parents = np.concatenate((states, closing))
+            actions = np.concatenate((works, np.full(len(closing), n)))
+            new_mask = np.concatenate((mask[states] | bits[works], mask[closing]))
+            new_year = np.concatenate((year[states], year[closing] + 1))
+            new_left = np.concatenate((left[states] - self.costs[works], np.full(len(closing), float(self.annual_budget))))
+            new_value = np.concatenate((value[states] + gain, value[closing]))
+            new_boost = np.concatenate((boost[states] * self.impacts[works], boost[closing]))
+            if not len(parents):
+                break
+
+            # Merge identical states, then keep the most promising ones
+            order = np.lexsort((-new_value, new_left, new_year, new_mask))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = ((new_mask[order][1:] != new_mask[order][:-1]) | (new_year[order][1:] != new_year[order][:-1])
+                         | (new_left[order][1:] != new_left[order][:-1]))
+            order = order[first]
+            remaining = ~((new_mask[order, None] & bits) != 0)
+            promise = new_value[order] + (self.years - new_year[order]) * (remaining @ potential)
+            if len(order) > self.beam_width:
+                order = order[np.argpartition(-promise, self.beam_width - 1)[:self.beam_width]]
+                self.exact = False
+
+            mask, year, left = new_mask[order], new_year[order], new_left[order]
+            value, boost = new_value[order], new_boost[order]
+            history.append((parents[order], actions[order]))
+            state = int(np.argmax(value))
+            if value[state] > best_value:
+                best_value, best_state = float(value[state]), (len(history) - 1, state)
+
+        return (*self._schedule(history, best_state, n), best_value)
+
+    @staticmethod
+    def _schedule(history: List[Tuple[np.ndarray, np.ndarray]], best_state: Tuple[int, int],
+                  n: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Walks the actions of the best state back to the start, then replays them
+        depth, state = best_state
+        actions = []
+        while depth >= 0:
+            parents, depth_actions = history[depth]
+            actions.append(int(depth_actions[state]))
+            state = int(parents[state])
+            depth -= 1
+
+        schedule = np.full(n, -1, dtype=np.intp)
+        sequence = []
+        year = 0
+        for action in reversed(actions):
+            if action == n:
+                year += 1
+            else:
+                schedule[action] = year
+                sequence.append(action)
+        return schedule, np.array(sequence, dtype=np.intp)
+
+
+class RenovationPlan:
+    """Multi-year schedule of the works of a project."""
+
+    __slots__ = ("result", "candidates", "costs", "net_costs", "annual_budget", "years", "schedule", "sequence",
+                 "value", "exact")
+
+    def __init__(self, result: PrioritizationResult, candidates: np.ndarray, costs: np.ndarray, annual_budget: float,
+                 years: int, schedule: np.ndarray, sequence: np.ndarray, value: float, exact: bool):
+        """
+        Args:
+            result: Prioritized works of the project
+            candidates: Positions in ``result`` of the works that were planned
+            costs: Estimated cost of each candidate, before grants
+            annual_budget: Net cost allowed per year
+            years: Length of the horizon
+            schedule: Year of each candidate, -1 if it does not fit the horizon
+            sequence: Scheduled candidates in execution order
+            value: Value of the schedule
+            exact: Whether the search explored every state
+        """
+        self.result = result
+        self.candidates = candidates
+        self.costs = costs
+        self.net_costs = net_costs(costs, result.grants[candidates])
+        self.annual_budget = annual_budget
+        self.years = years
+        self.schedule = schedule
+        self.sequence = sequence
+        self.value = value
+        self.exact = exact
+
+    def as_payload(self) -> Dict[str, Any]:
+        """
+        Returns the plan in the shape served by the planning endpoint.
+
+        The catalog is listed once; each year refers to works by their index in it, in execution order.
+        """
+        works = self.result.works[self.candidates]
+        grants = np.nan_to_num(self.result.grants[self.candidates])
+        years = []
+        for year in range(self.years):
+            in_year = self.sequence[self.schedule[self.sequence] == year]
+            years.append({
+                "year": year + 1,
+                "works": works[in_year].tolist(),
+                "cost": float(self.costs[in_year].sum()),
+                "grants": float(grants[in_year].sum()),
+                "netCost": float(self.net_costs[in_year].sum()),
+            })
+        return {
+            "works": self.result.catalog.as_payload(),
+            "annualBudget": self.annual_budget,
+            "exact": self.exact,
+            "value": self.value,
+            "schedule": years,
+            "unscheduled": works[self.schedule < 0].tolist(),
+        }
+
+
+def plan_renovation(project: ProjectRequest, years: int, annual_budget: Optional[float] = None,
+                    works: Optional[Sequence[int]] = None) -> RenovationPlan:
+    """
+    Spreads the prioritized works of a project over several years.
+
+    Args:
+        project: Renovation project data
+        years: Length of the horizon
+        annual_budget: Net cost allowed per year, the project's total budget spread over the horizon if None
+        works: Catalog indices of the works to plan, every prioritized work (up to PLAN_MAX_WORKS) if None
+
+    Returns:
+        Schedule of the works
+
+    Raises:
+        ValueError: If a work is not among the prioritized works of the project, or there are too many
+    """
+    system = PrioritizationSystem(project)
+    result = system.prioritize()
+    if annual_budget is None:
+        annual_budget = int(system.project_data['budgetData']['totalBudget']) / years
+
+    if works is None:
+        candidates = np.arange(min(len(result), PLAN_MAX_WORKS))
+    else:
+        positions = {work: position for position, work in enumerate(result.works.tolist())}
+        unknown = [str(work) for work in works if work not in positions]
+        if unknown:
+            raise ValueError(f"Travaux absents des priorités du projet : {', '.join(unknown)}")
+        candidates = np.array(sorted({positions[work] for work in works}), dtype=np.intp)
+
+    catalog_works = result.works[candidates]
+    costs = system._calculate_costs(catalog_works)
+    energy_impact = system.weighting.energy_impact
+    planner = RenovationPlanner(
+        costs=net_costs(costs, result.grants[candidates]),
+        scores=result.scores[candidates],
+        impacts=np.array([energy_impact.get(description, 1.0)
+                          for description in system.catalog.descriptions[catalog_works]], dtype=np.float64),
+        heating=np.isin(system.catalog.types[catalog_works], HEATING_TYPES),
+        annual_budget=annual_budget,
+        years=years,
+    )
+    schedule, sequence, value = planner.solve()
+    return RenovationPlan(result, candidates, costs, annual_budget, years, schedule, sequence, value, planner.exact)
@@ -0,0 +1,132 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from jose import jwt, JWTError
+
+from app.auth import SECRET_KEY, ALGORITHM
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', '0.001'))
+PROFILE_MAX_STACK_DEPTH = int(os.getenv('PROFILE_MAX_STACK_DEPTH', '128'))
+
+# Files of the event loop itself: a sample stopping there means the loop was waiting for I/O
+_LOOP_FILES = ("selectors.py", "base_events.py", "uvloop")
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread at a fixed interval, from a background thread.
+
+    The result is in the collapsed-stack format ("outer;inner count" per line),
+    which flamegraph.pl, speedscope and most flame graph viewers read directly.
+    Nothing is hooked into the profiled thread, so the profiled code runs at full
+    speed between samples.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        """
+        Args:
+            thread_id: Identifier of the thread to sample, as returned by threading.get_ident()
+            interval: Seconds between two samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> bytes:
+        """Stops sampling and returns the collapsed stacks, most frequent first."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common()).encode()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        if frame.f_code.co_filename.endswith(_LOOP_FILES):
+            return "(waiting)"
+        names = []
+        while frame is not None and len(names) < PROFILE_MAX_STACK_DEPTH:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+
+def _is_admin(authorization: bytes) -> bool:
+    scheme, _, token = authorization.decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer":
+        return False
+    try:
+        return bool(jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("is_admin"))
+    except JWTError:
+        return False
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware returning a sampled profile of the request instead of its response.
+
+    An administrator opts in by sending the ``X-Profile: 1`` header. The response
+    is then replaced with the collapsed stacks of the event loop thread while the
+    request ran, as text/plain; its original status is in ``X-Profile-Status``.
+    Time spent awaiting the database or a thread shows up as ``(waiting)``, and
+    concurrent requests are sampled too, so profile a quiet worker. Other
+    requests only pay for one header lookup.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        flag = next((value for name, value in scope["headers"] if name == PROFILE_HEADER), None)
+        if flag != b"1" or not _is_admin(dict(scope["headers"]).get(b"authorization", b"")):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def discard(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        profiler = SamplingProfiler(threading.get_ident())
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profile = profiler.stop()
+        elapsed = time.perf_counter() - started
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(profile)).encode()),
+                (b"x-profile-status", str(status_code).encode()),
+                (b"x-profile-samples", str(sum(profiler.samples.values())).encode()),
+                (b"x-profile-duration", f"{elapsed:.6f}".encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": profile})
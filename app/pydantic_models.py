@@ -1,4 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, EmailStr, Field
 
 class OwnerCreate(BaseModel):
     email: EmailStr
@@ -59,4 +61,20 @@ class ProjectRequest(BaseModel):
     region: str
     housingData: HousingData
     budgetData: BudgetData
-    technicalData: TechnicalData
\ No newline at end of file
+    technicalData: TechnicalData
+
+class WeightVariant(BaseModel):
+    desires: Dict[str, float] = {}
+    profile: Optional[str] = None
+    profileFactors: Optional[Dict[str, float]] = None
+
+class WhatIfRequest(BaseModel):
+    project: ProjectRequest
+    variants: List[WeightVariant] = Field(..., min_length=1)
+    top: Optional[int] = Field(None, ge=1)
+
+class PlanRequest(BaseModel):
+    project: ProjectRequest
+    years: int = Field(5, ge=1, le=30)
+    annualBudget: Optional[float] = Field(None, ge=0)
+    works: Optional[List[int]] = None
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import psycopg
+
+from app.batch import prioritize_batch
+from app.catalog import WorkCatalog, load_catalog, refresh_catalog
+from app.database.pool import connection_kwargs, get_sync_connection
+from app.pydantic_models import ProjectRequest
+from app.simulation import PrioritizationResult, PrioritizationSystem
+from app.weighting_registry import WeightingConfig, get_weighting, load_weighting, reload_weighting
+
+RESCORING_CHUNK_SIZE = int(os.getenv('RESCORING_CHUNK_SIZE', '500'))
+RESCORING_WORKERS = int(os.getenv('RESCORING_WORKERS', str(min(4, os.cpu_count() or 1))))
+# Arbitrary key of the advisory lock held by the only job allowed to run, across every worker and host
+RESCORING_LOCK_KEY = 7342002
+
+
+class RescoringBusyError(Exception):
+    """Raised when a re-scoring job is already running."""
+
+
+class RescoringStartError(Exception):
+    """Raised when a re-scoring job could not be started."""
+
+
+def snapshot_versions(catalog: WorkCatalog, weighting: WeightingConfig) -> Tuple[str, str]:
+    """
+    Identifies the content of a catalog and weighting snapshot, in a way comparable across processes.
+
+    The version counters of the snapshots are local to each process and restart at 1,
+    so the job records digests of their content instead.
+
+    Returns:
+        Catalog digest and weighting digest
+    """
+    return (
+        hashlib.blake2b(repr(catalog.rows).encode(), digest_size=16).hexdigest(),
+        hashlib.blake2b(json.dumps(weighting.files, sort_keys=True).encode(), digest_size=16).hexdigest(),
+    )
+
+
+def _init_worker(catalog_rows: Sequence[Tuple], weighting_files: Dict[str, Any]):
+    # Every chunk is scored against the snapshots the job started with, not whatever the child would load
+    load_catalog(list(catalog_rows))
+    load_weighting(weighting_files)
+
+
+def rescore_chunk(requests: Sequence[str]) -> List[Optional[str]]:
+    """
+    Computes the simulation results of stored project requests, in a worker process.
+
+    Args:
+        requests: Project requests as JSON text
+
+    Returns:
+        Each result as JSON text, None for requests that can no longer be simulated
+    """
+    try:
+        projects = [ProjectRequest.model_validate_json(request) for request in requests]
+        result = prioritize_batch(projects)
+    except ValueError:
+        # One invalid project fails the whole batch: fall back to one simulation at a time
+        return [_rescore_one(request) for request in requests]
+    return [
+        PrioritizationResult(result.catalog, ranking, scores[ranking], grants[ranking], category)
+        .to_json_bytes().decode()
+        for category, ranking, scores, grants in zip(result.income_categories, result.rankings, result.scores,
+                                                     result.grants)
+    ]
+
+
+def _rescore_one(request: str) -> Optional[str]:
+    try:
+        return PrioritizationSystem(ProjectRequest.model_validate_json(request)).prioritize().to_json_bytes().decode()
+    except ValueError as e:
+        logging.warning("Stored project cannot be re-scored: %s", str(e))
+        return None
+
+
+class RescoringJob(threading.Thread):
+    """
+    Background thread recomputing the stored result of every project.
+
+    Projects are read in id order through a server-side cursor, in chunks scored by a
+    process pool. The results of a chunk and the job checkpoint (the last id done)
+    are committed in the same transaction, so after a crash or a restart the next
+    job resumes after the last committed chunk, unless the catalog or the weighting
+    changed in between: it then starts over. An advisory lock, held on a
+    dedicated connection for the duration of the job, keeps a single job running
+    among every worker; it is released by the server if the process dies.
+    """
+
+    def __init__(self, restart: bool = False, chunk_size: int = RESCORING_CHUNK_SIZE,
+                 workers: int = RESCORING_WORKERS):
+        """
+        Args:
+            restart: Start over instead of resuming an unfinished job
+            chunk_size: Projects per chunk
+            workers: Scoring processes
+        """
+        super().__init__(name="rescoring", daemon=True)
+        self.restart = restart
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.job_id: Optional[int] = None
+        self.busy = False
+        self.error: Optional[Exception] = None
+        self.started = threading.Event()
+        self._stopping = threading.Event()
+
+    def stop(self):
+        """Asks the job to stop after the chunks being scored; it can be resumed later."""
+        self._stopping.set()
+
+    def run(self):
+        try:
+            with psycopg.connect(autocommit=True, **connection_kwargs()) as control:
+                if not control.execute("SELECT pg_try_advisory_lock(%s)", (RESCORING_LOCK_KEY,)).fetchone()[0]:
+                    self.busy = True
+                    return
+                try:
+                    # The watchers poll the files and wait for notifications: read the current state directly
+                    reload_weighting()
+                    catalog, weighting = refresh_catalog(), get_weighting()
+                    self.job_id, last_id = self._open_job(control, snapshot_versions(catalog, weighting))
+                    self.started.set()
+                    self._run_job(control, last_id, catalog, weighting)
+                finally:
+                    control.execute("SELECT pg_advisory_unlock(%s)", (RESCORING_LOCK_KEY,))
+        except Exception as e:
+            logging.exception("Re-scoring job %s failed", self.job_id)
+            self.error = e
+            if self.job_id is not None:
+                with get_sync_connection() as conn:
+                    conn.execute("UPDATE rescoring_job SET status = 'failed', error = %s, updated_at = now() "
+                                 "WHERE id = %s", (str(e), self.job_id))
+        finally:
+            self.started.set()
+
+    def _open_job(self, conn: psycopg.Connection, versions: Tuple[str, str]) -> Tuple[int, int]:
+        unfinished = conn.execute("SELECT id, last_id, catalog_version, weighting_version FROM rescoring_job "
+                                  "WHERE status IN ('running', 'interrupted', 'failed') "
+                                  "ORDER BY id DESC LIMIT 1").fetchone()
+        if unfinished is not None and not self.restart:
+            job_id, last_id, *job_versions = unfinished
+            # Chunks already committed were scored against the job's snapshot: mixing in another one is not resuming
+            if tuple(job_versions) == versions:
+                conn.execute("UPDATE rescoring_job SET status = 'running', error = NULL, updated_at = now() "
+                             "WHERE id = %s", (job_id,))
+                logging.info("Resuming re-scoring job %d after project %d", job_id, last_id)
+                return job_id, last_id
+            logging.info("Catalog or weighting changed since re-scoring job %d, starting over", job_id)
+        if unfinished is not None:
+            conn.execute("UPDATE rescoring_job SET status = 'abandoned', updated_at = now() "
+                         "WHERE status IN ('running', 'interrupted', 'failed')")
+        job_id = conn.execute("""
+                              INSERT INTO rescoring_job (status, total, skipped, catalog_version, weighting_version)
+                              SELECT 'running', count(request), count(*) - count(request), %s, %s FROM test
+                              RETURNING id
+                              """, versions).fetchone()[0]
+        logging.info("Started re-scoring job %d", job_id)
+        return job_id, 0
+
+    def _run_job(self, control: psycopg.Connection, last_id: int, catalog: WorkCatalog,
+                 weighting: WeightingConfig):
+        context = multiprocessing.get_context("spawn")
+        in_flight: deque = deque()
+        with ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(catalog.rows, weighting.files)) as pool, \
+                get_sync_connection() as reader, get_sync_connection(autocommit=True) as writer:
+            with reader.cursor(name="rescoring") as cur:
+                cur.execute("SELECT id, request::text FROM test WHERE id > %s AND request IS NOT NULL ORDER BY id",
+                            (last_id,))
+                while not self._stopping.is_set():
+                    rows = cur.fetchmany(self.chunk_size)
+                    if not rows:
+                        break
+                    ids, requests = zip(*rows)
+                    in_flight.append((ids, pool.submit(rescore_chunk, requests)))
+                    # Chunks are committed in id order, so that the checkpoint only moves past finished ones
+                    if len(in_flight) > self.workers:
+                        self._commit_chunk(writer, *in_flight.popleft())
+            while in_flight:
+                self._commit_chunk(writer, *in_flight.popleft())
+
+        status = "interrupted" if self._stopping.is_set() else "done"
+        control.execute("UPDATE rescoring_job SET status = %s, updated_at = now(), "
+                        "finished_at = CASE WHEN %s = 'done' THEN now() END WHERE id = %s",
+                        (status, status, self.job_id))
+        logging.info("Re-scoring job %d %s", self.job_id, status)
+
+    def _commit_chunk(self, conn: psycopg.Connection, ids: Sequence[int], future: Future):
+        results = future.result()
+        done = [(project_id, details) for project_id, details in zip(ids, results) if details is not None]
+        with conn.transaction():
+            if done:
+                conn.execute("""
+                             UPDATE test SET details = data.details::jsonb
+                             FROM (SELECT unnest(%s::int[]) AS id, unnest(%s::text[]) AS details) AS data
+                             WHERE test.id = data.id
+                             """, ([project_id for project_id, _ in done], [details for _, details in done]))
+            conn.execute("""
+                         UPDATE rescoring_job
+                         SET last_id = %s, processed = processed + %s, failed = failed + %s, updated_at = now()
+                         WHERE id = %s
+                         """, (ids[-1], len(done), len(ids) - len(done), self.job_id))
+
+
+_job: Optional[RescoringJob] = None
+_job_lock = threading.Lock()
+
+
+def start_rescoring(restart: bool = False, timeout: float = 30) -> int:
+    """
+    Starts a re-scoring job in the background, resuming the last unfinished one unless ``restart``.
+
+    Returns:
+        Id of the job
+
+    Raises:
+        RescoringBusyError: If a job is already running, in this process or another one
+        RescoringStartError: If the job failed or did not start within ``timeout`` seconds
+    """
+    global _job
+    with _job_lock:
+        if _job is not None and _job.is_alive():
+            raise RescoringBusyError(f"Re-scoring job {_job.job_id} is running")
+        job = RescoringJob(restart=restart)
+        job.start()
+        if not job.started.wait(timeout):
+            # It would otherwise carry on unnoticed, its id never returned
+            job.stop()
+            raise RescoringStartError(f"Re-scoring job did not start within {timeout} seconds")
+        if job.busy:
+            raise RescoringBusyError("Another process holds the re-scoring lock")
+        if job.job_id is None:
+            raise RescoringStartError("Re-scoring job failed to start") from job.error
+        _job = job
+        return job.job_id
+
+
+def stop_rescoring(timeout: float = 30):
+    """Stops the job of this process, if any, leaving it resumable."""
+    with _job_lock:
+        job = _job
+    if job is not None and job.is_alive():
+        job.stop()
+        job.join(timeout)
@@ -0,0 +1,13 @@
+from typing import Any
+
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+
+from app.metrics import request_timer
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """orjson response whose rendering counts as the serialization phase of the request."""
+
+    def render(self, content: Any) -> bytes:
+        with request_timer("serialization"):
+            return super().render(content)
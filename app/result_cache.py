@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', '1024'))
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', '600'))
+
+
+class ResultCache:
+    """Bounded, thread-safe LRU cache whose entries also expire after a time-to-live."""
+
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL):
+        """
+        Args:
+            maxsize: Maximum number of entries; 0 disables the cache
+            ttl: Seconds an entry stays valid after it was stored
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the cached value for ``key``, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Stores ``value``, evicting the least recently used entries beyond ``maxsize``."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drops the entry stored for ``key``, if any."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drops every entry, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the size, capacity and counters of the cache."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+result_cache = ResultCache()
@@ -1,19 +1,37 @@
-import json
 import logging
 import os
+from typing import List, Optional
 
-import psycopg2
-from fastapi import APIRouter, HTTPException, Depends
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Body, Response, Query
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from starlette import status
+from starlette.concurrency import run_in_threadpool
 
-from app.auth import create_access_token, authenticate_user, SECRET_KEY, ALGORITHM, hash_password, verify_user, \
-    check_admin, verify_token
-from app.database.calls import retrieve_owner
-from app.database.config import load_config
-from app.pydantic_models import OwnerCreate, OwnerLogin, ProjectRequest
-from app.simulation import prioritize
+from app.auth import create_access_token, authenticate_user, SECRET_KEY, ALGORITHM, verify_user, \
+    check_admin, check_metrics_access, verify_token
+from app.database.calls import retrieve_owner, insert_owner, fetch_projects, stream_projects, fetch_project, \
+    save_project, fetch_rescoring_job, delete_owner, PROJECT_FIELDS
+from app.hashing import password_hasher
+from app.metrics import render_metrics, request_timer, METRICS_CONTENT_TYPE
+from app.planner import plan_renovation
+from app.pydantic_models import OwnerCreate, OwnerLogin, ProjectRequest, WhatIfRequest, PlanRequest
+from app.rescoring import start_rescoring, RescoringBusyError, RescoringStartError
+from app.responses import ORJSONResponse
+from app.result_cache import result_cache
+from app.batch import prioritize_batch
+from app.bundle import optimize_bundle
+from app.simulation import prioritize, prioritize_profiles
+from app.warmup import is_ready
+from app.what_if import prioritize_variants
+from app.weighting_registry import get_weighting
+
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '50000'))
+MAX_WHAT_IF_VARIANTS = int(os.getenv('MAX_WHAT_IF_VARIANTS', '1000'))
+PROJECT_PAGE_SIZE = int(os.getenv('PROJECT_PAGE_SIZE', '100'))
+MAX_PROJECT_PAGE_SIZE = int(os.getenv('MAX_PROJECT_PAGE_SIZE', '1000'))
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -21,8 +39,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 # Authentication
 @router.post("/api/auth/login")
-def login(request: OwnerLogin):
-    user = authenticate_user(request.email, request.password)
+async def login(request: OwnerLogin):
+    user = await authenticate_user(request.email, request.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -30,126 +48,201 @@ def login(request: OwnerLogin):
             headers={"WWW-Authenticate": "Bearer"},
         )
     access_token = create_access_token(
-        data={"sub": user["email"], "is_admin": user["is_admin"]}
+        data={"sub": user["email"], "uid": user["id"], "is_admin": user["is_admin"]}
     )
     return {"access_token": access_token, "token_type": "bearer", "is_admin": user["is_admin"]}
 
 
 @router.post("/api/auth/register", status_code=201)
-def register_user(request: OwnerCreate):
-    hashed_password = hash_password(request.password)
-
-    config = load_config()
-    with psycopg2.connect(**config) as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM Owner WHERE email = %s", (request.email,))
-            if cur.fetchone():
-                logging.error("User already exists")
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="User already exists",
-                )
-
-            cur.execute(
-                "INSERT INTO Owner (email, password, name, firstname) VALUES (%s, %s, %s, %s)",
-                (request.email, hashed_password, request.nom, request.prenom)
-            )
-            conn.commit()
+async def register_user(request: OwnerCreate):
+    hashed_password = await password_hasher.hash(request.password)
+    if not await insert_owner(request.email, hashed_password, request.nom, request.prenom):
+        logging.error("User already exists")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User already exists",
+        )
     logging.info("User registered successfully: %s", request.email)
 
+
 @router.post("/api/auth/refresh")
-def refresh_token(token: str = Depends(oauth2_scheme)):
+async def refresh_token(token: str = Depends(oauth2_scheme)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": False})
         email = payload.get("sub")
         if not email:
             raise HTTPException(status_code=401, detail="Invalid token.")
-        verify_user(email)
+        user = await verify_user(email)
 
-        new_token = create_access_token({"sub": email})
+        new_token = create_access_token({"sub": email, "uid": user["id"], "is_admin": user["is_admin"]})
         return {"access_token": new_token, "token_type": "bearer"}
     except JWTError:
         raise HTTPException(status_code=401, detail="Cannot refresh token.")
 
 
+@router.delete("/api/auth/account", status_code=204)
+async def delete_account(owner: int = Depends(retrieve_owner)):
+    # The owner's projects are deleted with it; its tokens stop working on this worker at once
+    await delete_owner(owner)
+    logging.info("Owner account deleted: %d", owner)
+
+
 # Project Management
+def parse_project_fields(fields: Optional[str]) -> List[str]:
+    selected = [field.strip() for field in (fields or "").split(",") if field.strip()]
+    if not selected:
+        return list(PROJECT_FIELDS)
+    unknown = [field for field in selected if field not in PROJECT_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Champs inconnus : {', '.join(unknown)}. Champs disponibles : {', '.join(PROJECT_FIELDS)}"
+        )
+    # The id is always returned: it is the pagination cursor
+    if "id" not in selected:
+        selected.insert(0, "id")
+    return selected
+
+
+def project_record(columns: List[str], row: tuple) -> dict:
+    record = dict(zip(columns, row))
+    # The stored JSON text is embedded as is instead of being parsed and serialized again
+    if record.get("details") is not None:
+        record["details"] = orjson.Fragment(record["details"])
+    return record
+
+
 @router.get("/api/projects/retrieve")
-def get_projects(owner: int = Depends(retrieve_owner)):
-    data = []
+async def get_projects(
+        cursor: int = Query(0, ge=0, description="Id of the last project of the previous page"),
+        limit: int = Query(PROJECT_PAGE_SIZE, ge=1, le=MAX_PROJECT_PAGE_SIZE),
+        fields: Optional[str] = Query(None, description="Comma-separated columns, e.g. id,name,description"),
+        stream: bool = Query(False, description="Stream every project after the cursor as NDJSON"),
+        owner: int = Depends(retrieve_owner)
+):
+    columns = parse_project_fields(fields)
 
-    # TODO: Change this as well as the database
-    config = load_config()
-    with psycopg2.connect(**config) as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM test where owner_id = %s", (owner,))
-            rows = cur.fetchall()
-            for row in rows:
-                project = {
-                    "id": row[0],
-                    "name": row[1],
-                    "description": row[2],
-                    "details": row[3]
-                }
-                data.append(project)
-    return data
+    if stream:
+        async def lines():
+            async for row in stream_projects(owner, columns, after=cursor):
+                yield orjson.dumps(project_record(columns, row)) + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    # One extra row tells whether a next page exists
+    rows = await fetch_projects(owner, columns, after=cursor, limit=limit + 1)
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = str(rows[-1][columns.index("id")])
+    return ORJSONResponse([project_record(columns, row) for row in rows], headers=headers)
 
 @router.get("/api/projects/{project_id}")
-def get_project(project_id: int, owner: int = Depends(retrieve_owner)):
+async def get_project(project_id: int, owner: int = Depends(retrieve_owner)):
     # TODO: Change this as well as the database
-    config = load_config()
-    with psycopg2.connect(**config) as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM test WHERE id = %s", (project_id,))
-            row = cur.fetchone()
-            if not row:
-                logging.error("Project not found: %s", project_id)
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Projet non trouvé."
-                )
-            project = {
-                "id": row[0],
-                "nom": row[1],
-                "description": row[2],
-                "owner_id": row[3],
-                "details": row[4]
-            }
-    return project
+    row = await fetch_project(project_id)
+    if not row:
+        logging.error("Project not found: %s", project_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Projet non trouvé."
+        )
+    project = {
+        "id": row[0],
+        "nom": row[1],
+        "description": row[2],
+        "owner_id": row[3],
+        "details": None if row[4] is None else orjson.Fragment(row[4])
+    }
+    return ORJSONResponse(project)
 
 @router.post("/api/projects/create")
-def create_project(
+async def create_project(
         request: ProjectRequest,
         owner: int = Depends(retrieve_owner)
 ):
-    dataframe = prioritize(request)
-    config = load_config()
+    # Serialized once: the same bytes are stored as JSONB and returned to the client
+    details = prioritize(request).to_json_bytes()
 
     # TODO: Change this as well as the database
-    with psycopg2.connect(**config) as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-            INSERT INTO test (name, description, details, owner_id) VALUES (%s, %s, %s, %s)
-            """, (request.name, request.description, dataframe.to_json(orient="records"), owner))
+    await save_project(request.name, request.description, details, owner, request.model_dump_json())
+
+    return Response(content=details, media_type="application/json")
+
+@router.post("/api/projects/compare-profiles")
+async def compare_profiles(
+        request: ProjectRequest,
+        payload: dict = Depends(verify_token)
+):
+    results = prioritize_profiles(request)
+    return ORJSONResponse({profile: orjson.Fragment(result.to_json_bytes()) for profile, result in results.items()})
+
+@router.post("/api/projects/optimize-bundle")
+async def optimize_project_bundle(
+        request: ProjectRequest,
+        budget: Optional[float] = Query(None, ge=0, description="Maximum net cost, the project's total budget by default"),
+        payload: dict = Depends(verify_token)
+):
+    with request_timer("scoring"):
+        result = optimize_bundle(request, budget)
+    return ORJSONResponse(result.as_payload())
+
+@router.post("/api/projects/plan")
+async def plan_project(
+        request: PlanRequest,
+        payload: dict = Depends(verify_token)
+):
+    try:
+        with request_timer("scoring"):
+            plan = await run_in_threadpool(plan_renovation, request.project, request.years, request.annualBudget,
+                                           request.works)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    return ORJSONResponse(plan.as_payload())
+
+@router.post("/api/projects/simulate-batch")
+async def simulate_batch(
+        projects: List[ProjectRequest] = Body(..., max_length=MAX_BATCH_SIZE),
+        payload: dict = Depends(verify_token)
+):
+    try:
+        # Large batches take seconds of CPU: keep the event loop free meanwhile
+        with request_timer("scoring"):
+            result = await run_in_threadpool(prioritize_batch, projects)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    return ORJSONResponse(result.as_payload())
 
-    return dataframe.to_json(orient="records")
+@router.post("/api/projects/what-if")
+async def what_if(
+        request: WhatIfRequest,
+        payload: dict = Depends(verify_token)
+):
+    if len(request.variants) > MAX_WHAT_IF_VARIANTS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Trop de variantes : {MAX_WHAT_IF_VARIANTS} au maximum"
+        )
+    try:
+        with request_timer("scoring"):
+            result = await run_in_threadpool(prioritize_variants, request.project, request.variants)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    return ORJSONResponse(result.as_payload(request.top))
 
 @router.get("/api/admin/weighting", dependencies=[Depends(check_admin)])
-def get_weighting_files():
+async def get_weighting_files():
     try:
-        weighting_path = "app/weighting"
-        json_files = []
-
-        for filename in os.listdir(weighting_path):
-            if filename.endswith('.json'):
-                file_path = os.path.join(weighting_path, filename)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = json.load(f)
-                    json_files.append({
-                        "filename": filename,
-                        "content": content
-                    })
-
-        return json_files
+        return ORJSONResponse(get_weighting().as_files())
     except Exception as e:
         logging.error(f"Erreur lors de la lecture des fichiers JSON : {str(e)}")
         raise HTTPException(
@@ -157,6 +250,55 @@ def get_weighting_files():
             detail="Erreur lors de la récupération des fichiers de pondération"
         )
 
+@router.get("/api/admin/result-cache", dependencies=[Depends(check_admin)])
+async def get_result_cache_stats():
+    return result_cache.stats()
+
+@router.post("/api/admin/rescoring", dependencies=[Depends(check_admin)], status_code=202)
+async def start_rescoring_job(restart: bool = Query(False)):
+    # Resumes the last unfinished job unless restart is set
+    try:
+        job_id = await run_in_threadpool(start_rescoring, restart)
+    except RescoringBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Un recalcul est déjà en cours"
+        )
+    except RescoringStartError as e:
+        logging.error("Re-scoring job could not start: %s", str(e.__cause__ or e))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Le recalcul n'a pas pu démarrer"
+        )
+    return {"id": job_id}
+
+@router.get("/api/admin/rescoring", dependencies=[Depends(check_admin)])
+async def get_rescoring_job():
+    job = await fetch_rescoring_job()
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Aucun recalcul n'a été lancé"
+        )
+    job_id, job_status, total, processed, failed, skipped, last_id, error, started_at, updated_at, finished_at = job
+    return {
+        "id": job_id,
+        "status": job_status,
+        "total": total,
+        "processed": processed,
+        "failed": failed,
+        "skipped": skipped,
+        "lastId": last_id,
+        "error": error,
+        "startedAt": started_at,
+        "updatedAt": updated_at,
+        "finishedAt": finished_at,
+    }
+
+@router.get("/api/admin/metrics", dependencies=[Depends(check_metrics_access)])
+async def get_metrics():
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 @router.get("/api/auth/check-admin")
 async def check_admin_status(payload: dict = Depends(verify_token)):
     try:
@@ -167,4 +309,15 @@ async def check_admin_status(payload: dict = Depends(verify_token)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token invalide"
-        )
\ No newline at end of file
+        )
+
+# Health
+@router.get("/api/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+@router.get("/api/health/ready")
+async def readiness():
+    if not is_ready():
+        return ORJSONResponse({"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {"status": "ready"}
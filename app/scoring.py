@@ -0,0 +1,385 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.adjustment_rules import AdjustmentRule, BONUS, MULTIPLIER, HOUSING_RULES, TECHNICAL_RULES
+from app.catalog import WorkCatalog
+from app.weighting_registry import WeightingConfig
+
+
+class ScoringTables:
+    """Index arrays over the work catalog, compiled once per catalog and weighting version."""
+
+    def __init__(self, catalog: WorkCatalog, weighting: WeightingConfig):
+        """
+        Compiles the criterion and type lookups used by the scoring stages.
+
+        Args:
+            catalog: Work catalog snapshot
+            weighting: Weighting configuration snapshot
+        """
+        self.catalog = catalog
+        self.weighting = weighting
+        self.key = (catalog.version, weighting.version)
+
+        # Criterion universe: the weighted criteria first, then any criterion only named by work types or rules
+        self.criteria: List[str] = list(weighting.weights)
+        rule_criteria = [rule.criterion for rule in HOUSING_RULES + TECHNICAL_RULES if rule.criterion]
+        for criteria in list(weighting.works_criteria.values()) + [rule_criteria]:
+            for criterion in criteria:
+                if criterion not in self.criteria:
+                    self.criteria.append(criterion)
+        self.criterion_index: Dict[str, int] = {c: i for i, c in enumerate(self.criteria)}
+        self.weights = np.array([weighting.weights.get(c, 0) for c in self.criteria], dtype=np.float64)
+
+        # Criteria of each work, padded with the index of an extra always-zero slot
+        self.padding = len(self.criteria)
+        work_criteria = [[self.criterion_index[c] for c in weighting.works_criteria.get(t, [])] for t in catalog.types]
+        width = max((len(c) for c in work_criteria), default=0)
+        self.work_criteria = np.full((len(catalog), width), self.padding, dtype=np.intp)
+        for i, criteria in enumerate(work_criteria):
+            self.work_criteria[i, :len(criteria)] = criteria
+
+        self.type_names: List[str] = list(dict.fromkeys(catalog.types))
+        self.type_codes = np.array([self.type_names.index(t) for t in catalog.types], dtype=np.intp)
+        self._type_masks: Dict[Tuple[str, ...], np.ndarray] = {}
+
+        self.housing_rules = CompiledRules(HOUSING_RULES, self)
+        self.technical_rules = CompiledRules(TECHNICAL_RULES, self)
+
+    def criterion_values(self, profile_factors: Dict[str, float],
+                         weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """
+        Computes weight x profile factor for every criterion.
+
+        Args:
+            profile_factors: Factors of the chosen profile, 1 for criteria it does not mention
+            weights: Normalized weight of each criterion, instead of those of the weighting configuration
+
+        Returns:
+            Array over the criteria followed by the zero padding slot
+        """
+        factors = np.ones(self.padding + 1, dtype=np.float64)
+        for criterion, factor in profile_factors.items():
+            index = self.criterion_index.get(criterion)
+            if index is not None:
+                factors[index] = factor
+        if weights is None:
+            weights = self.weights
+        else:
+            weights = np.array([weights.get(c, 0) for c in self.criteria], dtype=np.float64)
+        values = np.zeros(self.padding + 1, dtype=np.float64)
+        values[:-1] = weights * factors[:-1]
+        return values
+
+    def type_mask(self, *types: str) -> np.ndarray:
+        """
+        Returns a read-only mask of the works belonging to any of the given types.
+
+        Args:
+            types: Work types (catalog genres)
+
+        Returns:
+            Boolean array over the works
+        """
+        mask = self._type_masks.get(types)
+        if mask is None:
+            codes = [self.type_names.index(t) for t in types if t in self.type_names]
+            mask = np.isin(self.type_codes, codes)
+            mask.flags.writeable = False
+            self._type_masks[types] = mask
+        return mask
+
+
+# Stands for any project value that no rule of a field mentions
+_UNLISTED = object()
+
+
+class CompiledRules:
+    """Adjustment table compiled into integer index arrays over the work catalog."""
+
+    def __init__(self, rules: Iterable[AdjustmentRule], tables: ScoringTables):
+        """
+        Resolves the target works of every rule and the rules enabled by every field value.
+
+        Args:
+            rules: Adjustment table
+            tables: Tables of the catalog the rules apply to
+        """
+        self.rules = tuple(rules)
+
+        # For each input field, a code per value mentioned in the table and a table of the rules each code
+        # enables; the last row stands for any value the table does not mention
+        by_field: Dict[Tuple[str, str], List[int]] = {}
+        for i, rule in enumerate(self.rules):
+            by_field.setdefault((rule.section, rule.field), []).append(i)
+        self._fields = []
+        for (section, field), indices in by_field.items():
+            values = []
+            for i in indices:
+                rule = self.rules[i]
+                for value in (rule.value if rule.test in ("in", "not in") else (rule.value,)):
+                    if value not in values:
+                        values.append(value)
+            codes = {value: code for code, value in enumerate(values)}
+            enabled = np.zeros((len(values) + 1, len(self.rules)), dtype=bool)
+            for code, value in enumerate(values + [_UNLISTED]):
+                for i in indices:
+                    enabled[code, i] = self.rules[i].matches(value)
+            self._fields.append((section, field, codes, enabled))
+
+        # One entry per (rule, target work), in table order
+        bonus_rule, bonus_work, bonus_criterion = [], [], []
+        multiplier_rule, multiplier_work, multiplier_factor = [], [], []
+        for i, rule in enumerate(self.rules):
+            mask = tables.catalog.descriptions == rule.description
+            if rule.work_type is not None:
+                mask &= tables.catalog.types == rule.work_type
+            works = np.flatnonzero(mask)
+            if rule.action == BONUS:
+                bonus_rule.extend([i] * len(works))
+                bonus_work.extend(works)
+                bonus_criterion.extend([tables.criterion_index[rule.criterion]] * len(works))
+            elif rule.action == MULTIPLIER:
+                multiplier_rule.extend([i] * len(works))
+                multiplier_work.extend(works)
+                multiplier_factor.extend([rule.factor] * len(works))
+            else:
+                raise ValueError(f"Invalid action: {rule.action}")
+
+        self.bonus_rule = np.array(bonus_rule, dtype=np.intp)
+        self.bonus_work = np.array(bonus_work, dtype=np.intp)
+        self.bonus_criterion = np.array(bonus_criterion, dtype=np.intp)
+        self.multiplier_rule = np.array(multiplier_rule, dtype=np.intp)
+        self.multiplier_work = np.array(multiplier_work, dtype=np.intp)
+        self.multiplier_factor = np.array(multiplier_factor, dtype=np.float64)
+
+    def active_rules(self, projects: Sequence[Dict]) -> np.ndarray:
+        """
+        Evaluates the rule conditions for projects, with one lookup per input field and project.
+
+        Args:
+            projects: Project data as dumped from the requests
+
+        Returns:
+            Boolean array of shape (projects, rules)
+        """
+        active = np.zeros((len(projects), len(self.rules)), dtype=bool)
+        for section, field, codes, enabled in self._fields:
+            active |= enabled[[codes.get(project[section].get(field), -1) for project in projects]]
+        return active
+
+    def field_codes(self, project: Dict) -> Tuple[int, ...]:
+        """
+        Encodes the project values of every field the table tests.
+
+        Values that no rule mentions share the code -1, since the rules cannot tell them apart.
+
+        Args:
+            project: Project data as dumped from the request
+
+        Returns:
+            One code per tested field
+        """
+        return tuple(codes.get(project[section].get(field), -1) for section, field, codes, _ in self._fields)
+
+    def apply(self, scores: np.ndarray, active: np.ndarray, criterion_values: np.ndarray) -> np.ndarray:
+        """
+        Applies every enabled rule in a single scatter pass per action.
+
+        Works on one project (1-D arrays) or many (one row per project).
+
+        Args:
+            scores: Scores of the works, modified in place
+            active: Enabled rules, as returned by ``active_rules``
+            criterion_values: Weight x profile factor of each criterion
+
+        Returns:
+            The adjusted scores
+        """
+        *projects, entries = np.nonzero(active[..., self.multiplier_rule])
+        np.multiply.at(scores, (*projects, self.multiplier_work[entries]), self.multiplier_factor[entries])
+        *projects, entries = np.nonzero(active[..., self.bonus_rule])
+        np.add.at(scores, (*projects, self.bonus_work[entries]),
+                  criterion_values[(*projects, self.bonus_criterion[entries])])
+        return scores
+
+
+# Type masks used by every simulation, compiled together with the tables
+_PRECOMPILED_TYPE_MASKS: Iterable[Tuple[str, ...]] = (
+    ("Murs",),
+    ("Toiture",),
+    ("Chauffage",),
+    ("Toiture", "Murs", "Sols"),
+    ("Chauffage", "Menuiseries et Vitrages"),
+)
+
+_tables: Optional[ScoringTables] = None
+_tables_lock = threading.Lock()
+
+
+def get_scoring_tables(catalog: WorkCatalog, weighting: WeightingConfig) -> ScoringTables:
+    """
+    Returns the compiled tables for the given snapshots, recompiling only when a version changed.
+
+    Args:
+        catalog: Work catalog snapshot
+        weighting: Weighting configuration snapshot
+
+    Returns:
+        Compiled scoring tables
+    """
+    global _tables
+    tables = _tables
+    if tables is None or tables.key != (catalog.version, weighting.version):
+        with _tables_lock:
+            tables = _tables
+            if tables is None or tables.key != (catalog.version, weighting.version):
+                tables = ScoringTables(catalog, weighting)
+                for types in _PRECOMPILED_TYPE_MASKS:
+                    tables.type_mask(*types)
+                _tables = tables
+    return tables
+
+
+def base_scores(tables: ScoringTables, criterion_values: np.ndarray) -> np.ndarray:
+    """
+    Sums, for each work, the values of the criteria of its type.
+
+    Args:
+        tables: Compiled scoring tables
+        criterion_values: Weight x profile factor of each criterion, one row per project
+
+    Returns:
+        Scores of shape (projects, works), or (works,) for a single project
+    """
+    # Criteria are summed column by column, in the order listed for each work type
+    scores = np.zeros(criterion_values.shape[:-1] + (len(tables.catalog),), dtype=np.float64)
+    for column in tables.work_criteria.T:
+        scores += criterion_values[..., column]
+    return scores
+
+
+def apply_budget_adjustments(tables: ScoringTables, scores: np.ndarray, total_budget, household_income,
+                             property_type, renovation_method) -> np.ndarray:
+    """
+    Applies the budget, property type and renovation method multipliers.
+
+    The project arguments are scalars for a single project or arrays over the projects.
+
+    Args:
+        tables: Compiled scoring tables
+        scores: Scores of the works, modified in place
+        total_budget: Total budget
+        household_income: Household income
+        property_type: "house", "apartment" or anything else
+        renovation_method: "professional", "do_it_yourself" or anything else
+
+    Returns:
+        The adjusted scores
+    """
+    total_budget = np.asarray(total_budget)[..., None]
+    household_income = np.asarray(household_income)[..., None]
+    property_type = np.asarray(property_type, dtype=object)[..., None]
+    renovation_method = np.asarray(renovation_method, dtype=object)[..., None]
+
+    # Score reduction for overly expensive works
+    scores[(total_budget < household_income) & (tables.catalog.estimated_grant > total_budget)] *= 0.8
+
+    # Adjustments according to property type
+    scores[(property_type == "house") & tables.type_mask("Toiture", "Murs", "Sols")] *= 1.1
+    scores[(property_type == "apartment") & tables.type_mask("Toiture")] *= 0.9
+
+    # Adjustments according to renovation method
+    scores[(renovation_method == "professional") & tables.type_mask("Chauffage", "Menuiseries et Vitrages")] *= 1.1
+    scores[(renovation_method == "do_it_yourself") & tables.type_mask("Chauffage")] *= 0.9
+
+    return scores
+
+
+def work_surfaces(tables: ScoringTables, total_surface, wall_surface, roof_surface) -> np.ndarray:
+    """
+    Returns the surface each work applies to: walls, roof or floor.
+
+    The project arguments are scalars for a single project or arrays over the projects.
+
+    Args:
+        tables: Compiled scoring tables
+        total_surface: Floor surface in m²
+        wall_surface: Wall surface in m²
+        roof_surface: Roof surface in m²
+
+    Returns:
+        Surfaces of shape (projects, works), or (works,) for a single project
+    """
+    return np.where(
+        tables.type_mask("Murs"), np.asarray(wall_surface)[..., None],
+        np.where(tables.type_mask("Toiture"), np.asarray(roof_surface)[..., None], np.asarray(total_surface)[..., None])
+    )
+
+
+def work_costs(tables: ScoringTables, total_surface, wall_surface, roof_surface) -> np.ndarray:
+    """
+    Computes the estimated cost of every work, before grants.
+
+    The project arguments are scalars for a single project or arrays over the projects.
+
+    Args:
+        tables: Compiled scoring tables
+        total_surface: Floor surface in m²
+        wall_surface: Wall surface in m²
+        roof_surface: Roof surface in m²
+
+    Returns:
+        Costs of shape (projects, works), or (works,) for a single project
+    """
+    catalog = tables.catalog
+    surface = work_surfaces(tables, total_surface, wall_surface, roof_surface)
+    return np.where(catalog.cost_by_surface, catalog.estimated_cost * surface, catalog.estimated_cost)
+
+
+def eligible_grants(tables: ScoringTables, total_surface, wall_surface, roof_surface, prime_multiplier,
+                    ceiling) -> np.ndarray:
+    """
+    Computes the eligible grant of every work.
+
+    The project arguments are scalars for a single project or arrays over the projects.
+
+    Args:
+        tables: Compiled scoring tables
+        total_surface: Floor surface in m²
+        wall_surface: Wall surface in m²
+        roof_surface: Roof surface in m²
+        prime_multiplier: Grant multiplier of the income category
+        ceiling: Share of the cost the grant may cover
+
+    Returns:
+        Grants of shape (projects, works), or (works,) for a single project
+    """
+    catalog = tables.catalog
+    surface = work_surfaces(tables, total_surface, wall_surface, roof_surface)
+    ceiling = np.asarray(ceiling)[..., None]
+
+    prime = catalog.estimated_grant * np.asarray(prime_multiplier)[..., None]
+    prime = np.where(catalog.grant_by_surface, prime * surface, prime)
+    prime_max = np.where(catalog.cost_by_surface, (catalog.estimated_cost * surface) * ceiling,
+                         catalog.estimated_cost * ceiling)
+
+    return np.minimum(prime, prime_max)
+
+
+def rank_works(scores: np.ndarray) -> np.ndarray:
+    """
+    Ranks the works with a positive score.
+
+    Ties are ordered exactly like DataFrame.sort_values(ascending=False) used to order them.
+
+    Args:
+        scores: Scores of the works of one project
+
+    Returns:
+        Catalog indices of the ranked works, best first
+    """
+    works = np.flatnonzero(scores > 0)[::-1]
+    return works[np.argsort(scores[works], kind="quicksort")][::-1]
@@ -1,13 +1,185 @@
-import json
+import hashlib
 import math
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Sequence, Tuple
 
-import psycopg2
-import pandas as pd
+import numpy as np
+import orjson
 
+from app.catalog import CATALOG_COLUMNS, WorkCatalog, get_catalog
 from app.database.calls import insert_project
-from app.database.config import load_config
+from app.metrics import request_timer, stage_timer
 from app.pydantic_models import ProjectRequest
+from app.result_cache import result_cache
+from app.scoring import get_scoring_tables, base_scores, apply_budget_adjustments, eligible_grants, rank_works, \
+    work_costs
+from app.weighting_registry import get_weighting
+
+PROFILE_FACTORS: Dict[str, Dict[str, float]] = {
+    "Eco-friendly": {
+        'Durabilité environnementale': 1.2,
+        'Production d\'énergie renouvelable': 1.2,
+        'Isolation thermique': 1.1
+    },
+    "Economy": {
+        'Économies d\'énergie': 1.2,
+        'Isolation thermique': 1.1,
+        'Modernisation des infrastructures': 1.1
+    },
+    "Valuation": {
+        'Augmentation de la valeur immobilière': 1.3,
+        'Modernisation des infrastructures': 1.2
+    },
+    "Comfort": {
+        'Confort et bien-être': 1.3,
+        'Isolation thermique': 1.2,
+        'Modernisation des infrastructures': 1.1
+    }
+}
+
+PROFILES = tuple(PROFILE_FACTORS)
+
+INCOME_MULTIPLIERS = {'R1': 6, 'R2': 4, 'R3': 3, 'R4': 2}
+
+GRANT_CEILINGS = {
+    'R1': 0.7,
+    'R2': 0.7,
+    'R3': 0.5,
+    'R4': 0.5
+}
+
+
+RESULT_COLUMNS = CATALOG_COLUMNS + ["Score", "Eligible Grant"]
+
+
+class PrioritizationResult:
+    """Prioritized works of a simulation, kept as arrays over the work catalog."""
+
+    __slots__ = ("catalog", "works", "scores", "grants", "income_category", "_json")
+
+    def __init__(self, catalog: WorkCatalog, works: np.ndarray, scores: np.ndarray, grants: np.ndarray,
+                 income_category: str):
+        """
+        Args:
+            catalog: Work catalog the project was scored against
+            works: Catalog indices of the prioritized works, best first
+            scores: Score of each prioritized work
+            grants: Eligible grant of each prioritized work
+            income_category: Income category of the household
+        """
+        # Results may be shared through the result cache, so their arrays are read-only
+        for array in (works, scores, grants):
+            array.flags.writeable = False
+        self.catalog = catalog
+        self.works = works
+        self.scores = scores
+        self.grants = grants
+        self.income_category = income_category
+        self._json = None
+
+    def __len__(self) -> int:
+        return len(self.works)
+
+    def records(self) -> List[Dict[str, Any]]:
+        """
+        Returns one dictionary per prioritized work, keyed by RESULT_COLUMNS.
+
+        Returns:
+            List of records, best first
+        """
+        rows = self.catalog.rows
+        return [
+            dict(zip(RESULT_COLUMNS, (*rows[work], score, grant)))
+            for work, score, grant in zip(self.works.tolist(), self.scores.tolist(), self.grants.tolist())
+        ]
+
+    def to_json_bytes(self) -> bytes:
+        """
+        Serializes the records to JSON once; missing or non-finite numbers become null.
+
+        Returns:
+            UTF-8 encoded JSON array
+        """
+        if self._json is None:
+            with request_timer("serialization"):
+                self._json = orjson.dumps(self.records())
+        return self._json
+
+    def to_dataframe(self):
+        """
+        Returns the records as a pandas DataFrame, for analytics only.
+
+        Returns:
+            DataFrame with RESULT_COLUMNS
+        """
+        import pandas as pd
+
+        return pd.DataFrame(self.records(), columns=RESULT_COLUMNS)
+
+
+def calculate_income_category(income: int, child_nbr: int, incomes: List[Tuple[str, float]]) -> Tuple[str, int]:
+    """
+    Determines the income category and associated grant multiplier.
+
+    Args:
+        income: Household income
+        child_nbr: Number of children
+        incomes: (category, threshold) pairs in ascending order
+
+    Returns:
+        Tuple containing the income category and multiplier
+    """
+    income = income - (5000 * child_nbr)
+
+    for category, threshold in incomes:
+        if income <= threshold:
+            return category, INCOME_MULTIPLIERS[category]
+
+    return "Not applicable", 0
+
+
+def calculate_roof_surface(floor_surface: int, roof_type: str) -> float:
+    """
+    Calculates the roof surface based on floor area and roof type.
+
+    Args:
+        floor_surface: Floor area in m²
+        roof_type: "flat", "single" or "double"
+
+    Returns:
+        Roof surface in m²
+    """
+    floor_length = floor_width = math.sqrt(floor_surface)
+
+    if roof_type == "flat":
+        return floor_surface
+    elif roof_type == "single":
+        roof_height = floor_length * math.tan(math.radians(37.5))
+        roof_width = math.sqrt(roof_height**2 + floor_width**2)
+        return floor_length * roof_width
+    elif roof_type == "double":
+        roof_height = (floor_length / 2) * math.tan(math.radians(37.5))
+        roof_width = math.sqrt(roof_height**2 + floor_width**2)
+        return 2 * (roof_width * floor_length)
+    else:
+        raise ValueError(f"Invalid roof type: {roof_type}")
+
+
+def calculate_wall_surface(floor_surface, floor_number):
+    """
+    Calculates the wall surface based on the number of floors and floor area.
+
+    Accepts scalars or arrays over several projects.
+
+    Args:
+        floor_surface: Floor area in m²
+        floor_number: Number of floors
+
+    Returns:
+        Wall surface in m²
+    """
+    wall_height = 2.5
+    floor_circumference = np.sqrt(floor_surface) * 4
+    return floor_circumference * wall_height * floor_number
 
 
 class PrioritizationSystem:
@@ -21,33 +193,50 @@ class PrioritizationSystem:
             project_data: Renovation project data
         """
         self.project_data = project_data.model_dump()
-        self.weights = self._load_weights()
+        # A single snapshot is used for the whole simulation, even if the files are reloaded meanwhile
+        self.weighting = get_weighting()
+        self.weights: Dict[str, float] = self.weighting.weights
         self.income_category, self.prime_multiplier = self._calculate_income_category()
-        self.works_df = self._load_work_from_db()
+        self.catalog = get_catalog()
+        self.tables = get_scoring_tables(self.catalog, self.weighting)
         self.profile_factors = self._get_profile_factors()
-        self.works_criteria = self._load_works_criteria()
+        self.works_criteria: Dict[str, List[str]] = self.weighting.works_criteria
+        self.criterion_values = self.tables.criterion_values(self.profile_factors)
 
-    def _load_weights(self) -> Dict[str, float]:
-        """
-        Loads and normalizes criteria weights.
-        
-        Returns:
-            Dictionary of normalized weights
+    def fingerprint(self, profile: Optional[str] = None) -> str:
         """
-        with open("app/weighting/desires.json", 'r') as f:
-            raw_weights = json.load(f)
-        total = sum(raw_weights.values())
-        return {k: v / total for k, v in raw_weights.items()}
+        Computes a canonical hash of everything the result depends on.
+
+        Fields the scoring ignores (name, description, region, window type) are left out,
+        numbers are parsed and values that no adjustment rule distinguishes share a code,
+        so equivalent wizard inputs get the same fingerprint.
+
+        Args:
+            profile: Profile to fingerprint the project with, instead of its own
 
-    def _load_works_criteria(self) -> Dict[str, List[str]]:
-        """
-        Loads criteria associated with each type of work.
-        
         Returns:
-            Dictionary of criteria by work type
+            Hexadecimal digest, also covering the catalog and weighting versions
         """
-        with open("app/weighting/work_criteria.json", 'r') as f:
-            return json.load(f)
+        housing_data = self.project_data['housingData']
+        budget_data = self.project_data['budgetData']
+        if profile is None:
+            profile = self.project_data['profileData']
+        key = (
+            self.catalog.version,
+            self.weighting.version,
+            profile if profile in PROFILE_FACTORS else None,
+            int(housing_data['surface']),
+            housing_data['roofType'],
+            int(budget_data['totalBudget']),
+            int(budget_data['householdIncome']),
+            int(budget_data['childNumber']),
+            int(budget_data['floorNumber']),
+            budget_data.get('propertyType'),
+            budget_data.get('renovationMethod'),
+            self.tables.housing_rules.field_codes(self.project_data),
+            self.tables.technical_rules.field_codes(self.project_data),
+        )
+        return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
 
     def _calculate_income_category(self) -> Tuple[str, int]:
         """
@@ -58,34 +247,7 @@ class PrioritizationSystem:
         """
         income = int(self.project_data['budgetData']['householdIncome'])
         child_nbr = int(self.project_data['budgetData']['childNumber'])
-        income = income - (5000 * child_nbr)
-
-        with open("app/weighting/incomes.json", 'r') as f:
-            revenus = json.load(f)
-
-        multiplier = {'R1': 6, 'R2': 4, 'R3': 3, 'R4': 2}
-        for category, threshold in revenus.items():
-            if income <= threshold:
-                return category, multiplier[category]
-
-        return "Not applicable", 0
-
-    def _load_work_from_db(self) -> pd.DataFrame:
-        """
-        Loads the list of works from the database.
-        
-        Returns:
-            DataFrame containing information on available works
-        """
-        config = load_config()
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                            SELECT genre, description, estimated_prime, is_prime_by_surface, estimated_cost, is_cost_by_surface FROM work_list
-                            """)
-                travaux = [(row[0], row[1], row[2], row[3], row[4], row[5]) for row in cur.fetchall()]
-
-        return pd.DataFrame(travaux, columns=["Type", "Description", "Estimated Grant", "Grant by surface?", "Estimated Cost", "Cost by surface?"])
+        return calculate_income_category(income, child_nbr, self.weighting.incomes)
 
     def _get_profile_factors(self) -> Dict[str, float]:
         """
@@ -94,29 +256,7 @@ class PrioritizationSystem:
         Returns:
             Dictionary of weighting factors
         """
-        profile_factors = {
-            "Eco-friendly": {
-                'Durabilité environnementale': 1.2,
-                'Production d\'énergie renouvelable': 1.2,
-                'Isolation thermique': 1.1
-            },
-            "Economy": {
-                'Économies d\'énergie': 1.2,
-                'Isolation thermique': 1.1,
-                'Modernisation des infrastructures': 1.1
-            },
-            "Valuation": {
-                'Augmentation de la valeur immobilière': 1.3,
-                'Modernisation des infrastructures': 1.2
-            },
-            "Comfort": {
-                'Confort et bien-être': 1.3,
-                'Isolation thermique': 1.2,
-                'Modernisation des infrastructures': 1.1
-            }
-        }
-
-        return profile_factors.get(self.project_data['profileData'], {})
+        return PROFILE_FACTORS.get(self.project_data['profileData'], {})
 
     def _calculate_roof_surface(self) -> float:
         """
@@ -127,288 +267,211 @@ class PrioritizationSystem:
         """
         floor_surface = int(self.project_data['housingData']['surface'])
         roof_type = self.project_data['housingData']['roofType']
-        floor_length = floor_width = math.sqrt(floor_surface)
-
-        if roof_type == "flat":
-            return floor_surface
-        elif roof_type == "single":
-            roof_height = floor_length * math.tan(math.radians(37.5))
-            roof_width = math.sqrt(roof_height**2 + floor_width**2)
-            return floor_length * roof_width
-        elif roof_type == "double":
-            roof_height = (floor_length / 2) * math.tan(math.radians(37.5))
-            roof_width = math.sqrt(roof_height**2 + floor_width**2)
-            return 2 * (roof_width * floor_length)
-        else:
-            raise ValueError(f"Invalid roof type: {roof_type}")
-
-    def _calculate_base_scores(self) -> pd.DataFrame:
+        return calculate_roof_surface(floor_surface, roof_type)
+
+    def _calculate_base_scores(self) -> np.ndarray:
         """
         Calculates base scores for each type of work.
         
         Returns:
-            DataFrame with calculated base scores
+            Array of base scores, aligned with the work catalog
         """
-        df = self.works_df.copy()
-        df['Score'] = 0.0
-
-        for idx, row in df.iterrows():
-            genre = row['Type']
-            criteres = self.works_criteria.get(genre, [])
-
-            score_total = 0
-            for critere in criteres:
-                base_score = self.weights.get(critere, 0)
-                facteur = self.profile_factors.get(critere, 1)
-                score_total += base_score * facteur
+        return base_scores(self.tables, self.criterion_values)
 
-            df.at[idx, 'Score'] = score_total
-
-        return df
-
-    def _apply_housing_adjustments(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _apply_housing_adjustments(self, scores: np.ndarray) -> np.ndarray:
         """
         Applies score adjustments based on housing characteristics.
+
+        The rules are listed in HOUSING_RULES (app/adjustment_rules.py).
         
         Args:
-            df: DataFrame of works with base scores
+            scores: Base scores of the works
             
         Returns:
-            DataFrame with adjusted scores
-        """
-        logement_data = self.project_data['housingData']
-
-        # Adjustments for heating
-        if logement_data.get('heatingType') != "pompe_a_chaleur":
-            mask = df['Description'] == "Heat pump"
-            df.loc[mask, 'Score'] += (
-                    self.weights.get('Durabilité environnementale', 0) *
-                    self.profile_factors.get('Durabilité environnementale', 1)
-            )
-        else:
-            df.loc[df['Description'] == "Heat pump", 'Score'] = 0
-
-        # Adjustment for programmable thermostat
-        if logement_data.get('programmableThermostat') == "non":
-            mask = df['Description'] == "Thermostat Programmable"
-            df.loc[mask, 'Score'] += (
-                    self.weights.get('Économies d\'énergie', 0) *
-                    self.profile_factors.get('Économies d\'énergie', 1)
-            )
-        else:
-            df.loc[df['Description'] == "Thermostat Programmable", 'Score'] = 0
-
-        # Adjustments for temperature
-        if logement_data.get('averageTemperature') == "<18":
-            adjustments = [
-                ("Thermostat Programmable", 'Économies d\'énergie'),
-                ("Isolation thermique des murs", 'Confort et bien-être'),
-                ("Isolation thermique du toit ou des combles", 'Isolation thermique'),
-                ("Isolation thermique des sols", 'Confort et bien-être')
-            ]
-
-            for desc, factor_key in adjustments:
-                mask = df['Description'] == desc
-                df.loc[mask, 'Score'] += (
-                        self.weights.get(factor_key, 0) *
-                        self.profile_factors.get(factor_key, 1)
-                )
-
-        # Adjustments for insulation
-        if logement_data.get('wallInsulation') == "non":
-            mask = df['Description'] == "Isolation thermique des murs"
-            df.loc[mask, 'Score'] += (
-                    self.weights.get('Isolation thermique', 0) *
-                    self.profile_factors.get('Isolation thermique', 1)
-            )
-
-        if logement_data.get('roofInsulation') == "non":
-            mask = df['Description'] == "Isolation thermique du toit ou des combles"
-            df.loc[mask, 'Score'] += (
-                    self.weights.get('Isolation thermique', 0) *
-                    self.profile_factors.get('Isolation thermique', 1)
-            )
-
-        if logement_data.get('floorInsulation') == "non":
-            mask = df['Description'] == "Isolation thermique des sols"
-            df.loc[mask, 'Score'] += (
-                    self.weights.get('Isolation thermique', 0) *
-                    self.profile_factors.get('Isolation thermique', 1)
-            )
-
-        return df
-
-    def _apply_budget_adjustments(self, df: pd.DataFrame) -> pd.DataFrame:
+            Adjusted scores
+        """
+        rules = self.tables.housing_rules
+        return rules.apply(scores, rules.active_rules([self.project_data])[0], self.criterion_values)
+
+    def _apply_budget_adjustments(self, scores: np.ndarray) -> np.ndarray:
         """
         Applies score adjustments based on budget.
         
         Args:
-            df: DataFrame of works with initial scores
+            scores: Scores of the works
             
         Returns:
-            DataFrame with scores adjusted according to budget
+            Scores adjusted according to budget
         """
         budget_data = self.project_data['budgetData']
         total_budget = int(budget_data['totalBudget'])
         household_income = int(budget_data['householdIncome'])
 
-        # Score reduction for overly expensive works
-        if total_budget < household_income:
-            df['Score'] = df.apply(
-                lambda x: x['Score'] * 0.8 if x['Estimated Grant'] > total_budget else x['Score'],
-                axis=1
-            )
-
-        # Adjustments according to property type
-        property_type = budget_data.get('propertyType')
-        if property_type == "house":
-            df['Score'] = df.apply(
-                lambda x: x['Score'] * 1.1 if x['Type'] in ["Toiture", "Murs", "Sols"] else x['Score'],
-                axis=1
-            )
-        elif property_type == "apartment":
-            df['Score'] = df.apply(
-                lambda x: x['Score'] * 0.9 if x['Type'] == "Toiture" else x['Score'],
-                axis=1
-            )
-
-        # Adjustments according to renovation method
-        renovation_method = budget_data.get('renovationMethod')
-        if renovation_method == "professional":
-            df['Score'] = df.apply(
-                lambda x: x['Score'] * 1.1 if x['Type'] in ["Chauffage", "Menuiseries et Vitrages"] else x['Score'],
-                axis=1
-            )
-        elif renovation_method == "do_it_yourself":
-            df['Score'] = df.apply(
-                lambda x: x['Score'] * 0.9 if x['Type'] == "Chauffage" else x['Score'],
-                axis=1
-            )
-
-        return df
-
-    def _apply_technical_adjustments(self, df: pd.DataFrame) -> pd.DataFrame:
+        return apply_budget_adjustments(self.tables, scores, total_budget, household_income,
+                                        budget_data.get('propertyType'), budget_data.get('renovationMethod'))
+
+    def _apply_technical_adjustments(self, scores: np.ndarray) -> np.ndarray:
         """
         Applies technical adjustments based on dwelling characteristics.
 
+        The rules are listed in TECHNICAL_RULES (app/adjustment_rules.py).
+
         Args:
-            df: DataFrame of works with initial scores
+            scores: Scores of the works
 
         Returns:
-            DataFrame with scores adjusted according to technical characteristics
-        """
-        # Example of technical adjustment
-        if self.project_data['technicalData']['hasSolarPanels'] == "non":
-            mask = df['Description'] == "Installation de panneaux photovoltaïques"
-            df.loc[mask, 'Score'] += (
-                    self.weights.get('Production d\'énergie renouvelable', 0) *
-                    self.profile_factors.get('Production d\'énergie renouvelable', 1)
-            )
-
-        if self.project_data['technicalData']['hasWaterHeater'] == "non":
-            mask = df['Description'] == "Chauffe-eau solaire"
-            df.loc[mask, 'Score'] += (
-                    self.weights.get('Durabilité environnementale', 0) *
-                    self.profile_factors.get('Durabilité environnementale', 1)
-            )
-
-        if self.project_data['technicalData']['boilerType'] != "pompe_a_chaleur":
-            mask = (df['Description'] == "Pompe à chaleur") & (df['Type'] == "Eau chaude")
-            df.loc[mask, 'Score'] += (
-                    self.weights.get('Durabilité environnementale', 0) *
-                    self.profile_factors.get('Durabilité environnementale', 1)
-            )
-
-        if self.project_data['technicalData']['ventilationType'] not in ["mechanique", "double_flux"]:
-            mask = df['Description'] == "Ventilation double flux avec échangeur thermique"
-            df.loc[mask, 'Score'] += (
-                    self.weights.get('Confort et bien-être', 0) * self.profile_factors.get('Confort et bien-être', 1)
-            )
-            df.loc[mask, 'Score'] += (
-                self.weights.get('Économies d\'énergie', 0) * self.profile_factors.get('Économies d\'énergie', 1)
-            )
-
-        return df
-
-    def _calculate_eligible_prime(self, df: pd.DataFrame) -> pd.DataFrame:
+            Scores adjusted according to technical characteristics
+        """
+        rules = self.tables.technical_rules
+        return rules.apply(scores, rules.active_rules([self.project_data])[0], self.criterion_values)
+
+    def _calculate_eligible_prime(self, works: np.ndarray) -> np.ndarray:
         """
         Calculates the eligible grant for each type of work.
 
         Args:
-            df: DataFrame of prioritized works
+            works: Catalog indices of the prioritized works
+
+        Returns:
+            Array of eligible grants, aligned with ``works``
+        """
+        total_surface = int(self.project_data['housingData']['surface'])
+        floor_number = int(self.project_data['budgetData']['floorNumber'])
+        wall_surface = self._calculate_wall_surface(floor_number)
+        roof_surface = self._calculate_roof_surface()
+
+        ceiling = GRANT_CEILINGS.get(self.income_category, 0)
+
+        grants = eligible_grants(self.tables, total_surface, wall_surface, roof_surface, self.prime_multiplier, ceiling)
+        return grants[works]
+
+    def _calculate_costs(self, works: np.ndarray) -> np.ndarray:
+        """
+        Calculates the estimated cost of each work, before grants.
+
+        Args:
+            works: Catalog indices of the works
 
         Returns:
-            DataFrame with calculated eligible grants
+            Array of costs, aligned with ``works``
         """
         total_surface = int(self.project_data['housingData']['surface'])
         floor_number = int(self.project_data['budgetData']['floorNumber'])
         wall_surface = self._calculate_wall_surface(floor_number)
         roof_surface = self._calculate_roof_surface()
 
-        ceilings = {
-            'R1': 0.7,
-            'R2': 0.7,
-            'R3': 0.5,
-            'R4': 0.5
-        }
-        ceiling = ceilings.get(self.income_category, 0)
-
-        def prime_eligible(row):
-            prime = row['Estimated Grant'] * self.prime_multiplier
-            surface = wall_surface if row['Type'] == "Murs" else (roof_surface if row['Type'] == "Toiture" else total_surface)
-
-            if row['Grant by surface?']:
-                if row['Cost by surface?']:
-                    prime_max = (row['Estimated Cost'] * surface) * ceiling
-                else:
-                    prime_max = row['Estimated Cost'] * ceiling
-                prime = prime * surface
-            else:
-                if row['Cost by surface?']:
-                    prime_max = (row['Estimated Cost'] * surface) * ceiling
-                else:
-                    prime_max = row['Estimated Cost'] * ceiling
-
-            return min(prime, prime_max)
-
-        df['Eligible Grant'] = df.apply(prime_eligible, axis=1)
-        return df
-
-    def prioritize(self) -> pd.DataFrame:
+        return work_costs(self.tables, total_surface, wall_surface, roof_surface)[works]
+
+    def score_rows(self, criterion_values: np.ndarray) -> np.ndarray:
+        """
+        Runs every scoring stage of this project for several rows of criterion values at once.
+
+        The adjustment rules are evaluated once and shared by all rows; each row is scored
+        with exactly the operations of prioritize(), so identical rows give identical scores.
+
+        Args:
+            criterion_values: Weight x profile factor of each criterion, one row per variant
+
+        Returns:
+            Scores of shape (rows, works)
+        """
+        tables = self.tables
+        housing, technical = tables.housing_rules, tables.technical_rules
+        rows = len(criterion_values)
+        budget_data = self.project_data['budgetData']
+        housing_active = np.broadcast_to(housing.active_rules([self.project_data]), (rows, len(housing.rules)))
+        technical_active = np.broadcast_to(technical.active_rules([self.project_data]), (rows, len(technical.rules)))
+
+        scores = base_scores(tables, criterion_values)
+        housing.apply(scores, housing_active, criterion_values)
+        apply_budget_adjustments(
+            tables, scores,
+            np.full(rows, int(budget_data['totalBudget'])),
+            np.full(rows, int(budget_data['householdIncome'])),
+            np.full(rows, budget_data.get('propertyType'), dtype=object),
+            np.full(rows, budget_data.get('renovationMethod'), dtype=object),
+        )
+        technical.apply(scores, technical_active, criterion_values)
+        return scores
+
+    def score_matrix(self) -> np.ndarray:
+        """
+        Expresses the scoring of this project as a linear map of the criterion values.
+
+        Every stage either multiplies scores by factors that only depend on the project
+        or adds criterion values, so scoring the identity matrix gives a matrix whose rows
+        are the contribution of each criterion value to every score. The scores under any
+        weights and profile factors are then the sum over the criteria of criterion value x row.
+
+        Returns:
+            Array of shape (criteria + 1, works), the last row being the zero padding slot
+        """
+        return self.score_rows(np.eye(self.tables.padding + 1))
+
+    def prioritize_profiles(self, profiles: Sequence[str] = PROFILES) -> Dict[str, PrioritizationResult]:
+        """
+        Prioritizes the works under several profiles in one pass.
+
+        The profile factors form a matrix over the criteria, scored by score_rows; the
+        grants do not depend on the profile and are computed once. Each result equals
+        the one prioritize() gives for the project with that profile.
+
+        Args:
+            profiles: Names of PROFILE_FACTORS
+
+        Returns:
+            Prioritized works of each profile
+        """
+        criterion_values = np.stack([self.tables.criterion_values(PROFILE_FACTORS.get(profile, {}))
+                                     for profile in profiles])
+        scores = self.score_rows(criterion_values)
+        grants = self._calculate_eligible_prime(np.arange(len(self.catalog)))
+
+        results = {}
+        for profile, profile_scores in zip(profiles, scores):
+            works = rank_works(profile_scores)
+            results[profile] = PrioritizationResult(self.catalog, works, profile_scores[works], grants[works],
+                                                    self.income_category)
+        return results
+
+    def prioritize(self) -> PrioritizationResult:
         """
         Prioritizes renovation works based on all criteria.
         
         Returns:
-            DataFrame of prioritized works with scores and grants
+            Prioritized works with scores and grants
         """
         # Add income categories to project data
         self.project_data['incomeCategory'] = self.income_category
         self.project_data['primeMultiplier'] = self.prime_multiplier
 
         # Calculate base scores
-        df = self._calculate_base_scores()
+        with stage_timer("base_scores"):
+            scores = self._calculate_base_scores()
 
         # Apply adjustments based on dwelling
-        df = self._apply_housing_adjustments(df)
+        with stage_timer("housing_adjustments"):
+            scores = self._apply_housing_adjustments(scores)
 
         # Apply adjustments based on budget
-        df = self._apply_budget_adjustments(df)
+        with stage_timer("budget_adjustments"):
+            scores = self._apply_budget_adjustments(scores)
 
         # Apply technical adjustments
-        df = self._apply_technical_adjustments(df)
-
-        # Remove rows with zero scores
-        df = df[df['Score'] > 0]
+        with stage_timer("technical_adjustments"):
+            scores = self._apply_technical_adjustments(scores)
 
-        # Sort by score in descending order
-        df = df.sort_values(by='Score', ascending=False)
+        # Remove works with zero scores and sort by score in descending order
+        with stage_timer("ranking"):
+            works = rank_works(scores)
 
         # Calculate eligible grants
-        df = self._calculate_eligible_prime(df)
+        with stage_timer("eligible_grants"):
+            grants = self._calculate_eligible_prime(works)
 
-        return df
+        return PrioritizationResult(self.catalog, works, scores[works], grants, self.income_category)
 
-    def _calculate_wall_surface(self, floor_number) -> Tuple[float, float]:
+    def _calculate_wall_surface(self, floor_number) -> float:
         """
         Calculates the wall surface based on the number of floors and floor area.
 
@@ -419,12 +482,10 @@ class PrioritizationSystem:
             Wall surface in m²
         """
         floor_surface = int(self.project_data['housingData']['surface'])
-        wall_height = 2.5
-        floor_circumference = math.sqrt(floor_surface) * 4
-        return floor_circumference * wall_height * floor_number
+        return calculate_wall_surface(floor_surface, floor_number)
 
 
-def prioritize(project_data: ProjectRequest) -> pd.DataFrame:
+def prioritize(project_data: ProjectRequest) -> PrioritizationResult:
     """
     Main entry point for prioritizing works.
     
@@ -432,10 +493,42 @@ def prioritize(project_data: ProjectRequest) -> pd.DataFrame:
         project_data: Renovation project data
         
     Returns:
-        DataFrame of prioritized works
+        Prioritized works
     """
     insert_project(project_data)
-    system = PrioritizationSystem(project_data)
-    prioritized_works = system.prioritize()
+    with request_timer("scoring"):
+        system = PrioritizationSystem(project_data)
+
+        # Identical inputs under the same catalog and weighting versions skip the scoring entirely
+        fingerprint = system.fingerprint()
+        prioritized_works = result_cache.get(fingerprint)
+        if prioritized_works is None:
+            prioritized_works = system.prioritize()
+            result_cache.put(fingerprint, prioritized_works)
+
+    return prioritized_works
+
 
-    return prioritized_works
\ No newline at end of file
+def prioritize_profiles(project_data: ProjectRequest) -> Dict[str, PrioritizationResult]:
+    """
+    Prioritizes works for every profile at once, whatever profile the project names.
+
+    Args:
+        project_data: Renovation project data
+
+    Returns:
+        Prioritized works of each profile of PROFILE_FACTORS
+    """
+    with request_timer("scoring"):
+        system = PrioritizationSystem(project_data)
+
+        # The results are shared with prioritize(), so choosing a profile afterwards is a cache hit
+        fingerprints = {profile: system.fingerprint(profile) for profile in PROFILES}
+        results = {profile: result_cache.get(fingerprint) for profile, fingerprint in fingerprints.items()}
+        missing = [profile for profile, result in results.items() if result is None]
+        if missing:
+            for profile, result in system.prioritize_profiles(missing).items():
+                result_cache.put(fingerprints[profile], result)
+                results[profile] = result
+
+    return results
@@ -0,0 +1,53 @@
+import gc
+import threading
+from typing import Any, Dict
+
+from app.catalog import get_catalog
+from app.scoring import get_scoring_tables
+from app.weighting_registry import get_weighting
+
+_ready = threading.Event()
+
+
+def warm_up() -> Dict[str, Any]:
+    """
+    Builds the work catalog, the weighting snapshot and the compiled scoring tables.
+
+    Called in the gunicorn master before forking, so every worker inherits them,
+    and again in each worker, where it only checks that they are current.
+
+    Returns:
+        Versions of the snapshots that were built
+    """
+    catalog = get_catalog()
+    weighting = get_weighting()
+    get_scoring_tables(catalog, weighting)
+    return {"catalog_version": catalog.version, "weighting_version": weighting.version, "works": len(catalog)}
+
+
+def freeze_for_fork() -> int:
+    """
+    Moves every object allocated so far out of the garbage collector's reach.
+
+    The collector then never writes to the pages of the warmed-up snapshots,
+    which keeps them shared copy-on-write between forked workers.
+
+    Returns:
+        Number of frozen objects
+    """
+    gc.collect()
+    gc.freeze()
+    return gc.get_freeze_count()
+
+
+def set_ready(ready: bool):
+    """Marks this worker as ready, or not, to receive traffic."""
+    if ready:
+        _ready.set()
+    else:
+        _ready.clear()
+
+
+def is_ready() -> bool:
+    """Whether this worker has finished warming up and is not shutting down."""
+    return _ready.is_set()
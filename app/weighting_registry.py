@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+WEIGHTING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "weighting")
+WEIGHTING_POLL_INTERVAL = float(os.getenv('WEIGHTING_POLL_INTERVAL', '2'))
+
+
+class WeightingConfig:
+    """Immutable snapshot of the weighting files, parsed and normalized once."""
+
+    __slots__ = ("version", "mtimes", "files", "weights", "works_criteria", "incomes", "energy_impact")
+
+    def __init__(self, files: Dict[str, Any], mtimes: Dict[str, float], version: int):
+        """
+        Derives every table used by the simulations from the raw file contents.
+
+        Args:
+            files: Parsed content of each JSON file, keyed by file name
+            mtimes: Modification time of each file when it was read
+            version: Monotonic version of the configuration
+        """
+        self.version = version
+        self.mtimes = mtimes
+        self.files = files
+
+        raw_weights = files["desires.json"]
+        total = sum(raw_weights.values())
+        self.weights: Dict[str, float] = {k: v / total for k, v in raw_weights.items()}
+        self.works_criteria: Dict[str, List[str]] = files["work_criteria.json"]
+        self.incomes: List[Tuple[str, float]] = list(files["incomes.json"].items())
+        self.energy_impact: Dict[str, float] = files.get("energy_impact.json", {})
+
+    def as_files(self) -> List[Dict[str, Any]]:
+        """Returns the raw files in the shape served by the admin endpoint."""
+        return [{"filename": filename, "content": content} for filename, content in self.files.items()]
+
+
+class WeightingRegistry:
+    """Holds the current weighting snapshot and swaps it when the files change on disk."""
+
+    def __init__(self, path: str = WEIGHTING_PATH):
+        self.path = path
+        self._config: Optional[WeightingConfig] = None
+        self._version = 0
+        self._failed_mtimes: Optional[Dict[str, float]] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> WeightingConfig:
+        """Returns the current snapshot, loading the files on first use."""
+        config = self._config
+        if config is None:
+            with self._lock:
+                if self._config is None:
+                    self._config = self._load(self._scan())
+                config = self._config
+        return config
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reloads the files if any of them was added, removed or modified.
+
+        A file that fails to parse keeps the previous snapshot in place.
+
+        Returns:
+            True if a new snapshot was installed
+        """
+        mtimes = self._scan()
+        with self._lock:
+            if self._config is not None and mtimes in (self._config.mtimes, self._failed_mtimes):
+                return False
+            try:
+                self._config = self._load(mtimes)
+            except (OSError, ValueError, KeyError, ZeroDivisionError) as e:
+                self._failed_mtimes = mtimes
+                logging.error("Weighting reload failed, keeping version %s: %s",
+                              self._config.version if self._config else None, str(e))
+                return False
+        logging.info("Weighting configuration reloaded: version %d", self._config.version)
+        return True
+
+    def install(self, files: Dict[str, Any]) -> WeightingConfig:
+        """
+        Replaces the snapshot with already parsed file contents, e.g. those of another process.
+
+        Args:
+            files: Parsed content of each JSON file, keyed by file name
+
+        Returns:
+            The new snapshot
+        """
+        with self._lock:
+            self._version += 1
+            self._config = WeightingConfig(files, {}, self._version)
+            return self._config
+
+    def _scan(self) -> Dict[str, float]:
+        return {
+            filename: os.stat(os.path.join(self.path, filename)).st_mtime
+            for filename in sorted(os.listdir(self.path))
+            if filename.endswith('.json')
+        }
+
+    def _load(self, mtimes: Dict[str, float]) -> WeightingConfig:
+        files = {}
+        for filename in mtimes:
+            with open(os.path.join(self.path, filename), 'r', encoding='utf-8') as f:
+                files[filename] = json.load(f)
+        self._version += 1
+        return WeightingConfig(files, mtimes, self._version)
+
+
+class WeightingWatcher(threading.Thread):
+    """Background thread polling the weighting files for changes."""
+
+    def __init__(self, registry: WeightingRegistry, interval: float = WEIGHTING_POLL_INTERVAL):
+        super().__init__(name="weighting-watcher", daemon=True)
+        self.registry = registry
+        self.interval = interval
+        self._stopping = threading.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    def run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.registry.reload_if_changed()
+            except OSError as e:
+                logging.error("Weighting watcher failed: %s", str(e))
+
+
+_registry = WeightingRegistry()
+_watcher: Optional[WeightingWatcher] = None
+
+
+def get_weighting() -> WeightingConfig:
+    """Returns the current weighting snapshot."""
+    return _registry.get()
+
+
+def load_weighting(files: Dict[str, Any]) -> WeightingConfig:
+    """Installs a weighting snapshot made of the given file contents."""
+    return _registry.install(files)
+
+
+def reload_weighting() -> bool:
+    """Reloads the weighting files now if they changed on disk."""
+    return _registry.reload_if_changed()
+
+
+def start_weighting_watcher():
+    """Starts polling the weighting files for changes."""
+    global _watcher
+    if _watcher is None:
+        _watcher = WeightingWatcher(_registry)
+        _watcher.start()
+
+
+def stop_weighting_watcher():
+    """Stops polling the weighting files."""
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher.join(timeout=5)
+        _watcher = None
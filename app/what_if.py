@@ -0,0 +1,145 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.catalog import WorkCatalog
+from app.pydantic_models import ProjectRequest, WeightVariant
+from app.scoring import ScoringTables, rank_works
+from app.simulation import PROFILE_FACTORS, PrioritizationSystem
+
+
+class WhatIfResult:
+    """Rankings of one project under several weight vectors."""
+
+    __slots__ = ("catalog", "income_category", "grants", "scores", "rankings")
+
+    def __init__(self, catalog: WorkCatalog, income_category: str, grants: np.ndarray, scores: np.ndarray,
+                 rankings: List[np.ndarray]):
+        """
+        Args:
+            catalog: Work catalog the project was scored against
+            income_category: Income category of the household
+            grants: Eligible grant of every work, the same under every variant
+            scores: Scores of shape (variants, works)
+            rankings: Catalog indices of the ranked works of each variant, best first
+        """
+        self.catalog = catalog
+        self.income_category = income_category
+        self.grants = grants
+        self.scores = scores
+        self.rankings = rankings
+
+    def __len__(self) -> int:
+        return len(self.rankings)
+
+    def rank_ranges(self) -> List[Optional[Dict[str, int]]]:
+        """
+        Summarizes how the rank of every work moves across the variants.
+
+        Returns:
+            For each work, its best and worst rank (1 being the first) and the number of variants
+            ranking it, or None if no variant does
+        """
+        positions = np.full(self.scores.shape, -1, dtype=np.intp)
+        for variant, ranking in enumerate(self.rankings):
+            positions[variant, ranking] = np.arange(1, len(ranking) + 1)
+        ranked = positions > 0
+        counts = ranked.sum(axis=0)
+        best = np.where(ranked, positions, np.iinfo(np.intp).max).min(axis=0, initial=np.iinfo(np.intp).max)
+        worst = positions.max(axis=0, initial=-1)
+        return [
+            {"best": b, "worst": w, "rankedIn": n} if n else None
+            for b, w, n in zip(best.tolist(), worst.tolist(), counts.tolist())
+        ]
+
+    def as_payload(self, top: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Returns the result in the shape served by the what-if endpoint.
+
+        The catalog and the grants are listed once; each variant refers to works by their index in it.
+
+        Args:
+            top: Number of works kept in each ranking, all of them if None
+        """
+        return {
+            "works": self.catalog.as_payload(),
+            "incomeCategory": self.income_category,
+            "eligibleGrants": self.grants.tolist(),
+            "variants": [
+                {"ranking": ranking[:top].tolist(), "scores": scores[ranking[:top]].tolist()}
+                for ranking, scores in zip(self.rankings, self.scores)
+            ],
+            "rankRanges": self.rank_ranges(),
+        }
+
+
+def variant_criterion_values(tables: ScoringTables, desires: Dict[str, float], default_factors: Dict[str, float],
+                             variant: WeightVariant) -> np.ndarray:
+    """
+    Computes the criterion values of a variant.
+
+    Args:
+        tables: Compiled scoring tables
+        desires: Raw weights of desires.json, which the variant overrides
+        default_factors: Profile factors used when the variant names none
+        variant: Weight vector and profile of the variant
+
+    Returns:
+        Weight x profile factor of every criterion, followed by the zero padding slot
+
+    Raises:
+        ValueError: If the variant names an unknown criterion or profile, or has invalid weights
+    """
+    unknown = [c for c in (*variant.desires, *(variant.profileFactors or {})) if c not in tables.criterion_index]
+    if unknown:
+        raise ValueError(f"Critères inconnus : {', '.join(unknown)}")
+    if variant.profileFactors is not None:
+        factors = variant.profileFactors
+    elif variant.profile is not None:
+        if variant.profile not in PROFILE_FACTORS:
+            raise ValueError(f"Profil inconnu : {variant.profile}")
+        factors = PROFILE_FACTORS[variant.profile]
+    else:
+        factors = default_factors
+
+    # Normalized like desires.json itself
+    desires = {**desires, **variant.desires}
+    total = sum(desires.values())
+    if total <= 0 or any(weight < 0 for weight in desires.values()):
+        raise ValueError("Les poids doivent être positifs et de somme non nulle")
+    return tables.criterion_values(factors, {criterion: weight / total for criterion, weight in desires.items()})
+
+
+def prioritize_variants(project: ProjectRequest, variants: Sequence[WeightVariant]) -> WhatIfResult:
+    """
+    Prioritizes the works of one project under several weight vectors.
+
+    The adjustment rules, surfaces and grants of the project are evaluated once, as a
+    score matrix (see PrioritizationSystem.score_matrix); each variant then only costs
+    a weighted sum of its rows and a ranking.
+
+    Args:
+        project: Renovation project data
+        variants: Weight vectors and profiles to compare
+
+    Returns:
+        Scores, rankings and rank ranges of every variant
+
+    Raises:
+        ValueError: If a variant is invalid
+    """
+    system = PrioritizationSystem(project)
+    tables = system.tables
+    desires = system.weighting.files["desires.json"]
+    values = np.array([variant_criterion_values(tables, desires, system.profile_factors, variant)
+                       for variant in variants]).reshape(len(variants), tables.padding + 1)
+
+    # Criterion by criterion rather than a matrix product, so that works scored identically
+    # by the stages keep bit-identical scores and their ties are ranked like in prioritize()
+    matrix = system.score_matrix()
+    scores = np.zeros((len(variants), len(system.catalog)), dtype=np.float64)
+    for criterion in np.flatnonzero(matrix.any(axis=1)):
+        scores += values[:, criterion, None] * matrix[criterion]
+
+    grants = system._calculate_eligible_prime(np.arange(len(system.catalog)))
+    return WhatIfResult(system.catalog, system.income_category, grants, scores, [rank_works(row) for row in scores])
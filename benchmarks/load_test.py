@@ -0,0 +1,249 @@
+"""
+End-to-end HTTP load test of the API.
+
+Starts the application with gunicorn (same configuration as production) against
+either a throwaway local PostgreSQL (--local-db, requires pgserver) or the
+database of CONFIG_FILE, seeds owners and projects, then drives a mix of login,
+create, listing and detail requests from concurrent virtual users.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.load_test --local-db --workers 2 --concurrency 50 --duration 30
+    python -m benchmarks.load_test --local-db --pool-size 5 --mix login=1,create=2,retrieve=5,get=5
+
+Reports p50/p95/p99 latency, throughput and errors per route.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.synthetic import random_project, random_projects
+
+ROUTES = ("login", "create", "retrieve", "get")
+PASSWORD = "load-test-password"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_local_database(directory: str) -> str:
+    """Starts a private PostgreSQL in ``directory`` and returns a CONFIG_FILE pointing to it."""
+    import pgserver
+
+    # cleanup_mode="delete": the server and its data go away when this process exits
+    server = pgserver.get_server(directory, cleanup_mode="delete")
+    server.psql("CREATE DATABASE loadtest;")
+    config = os.path.join(directory, "database.ini")
+    with open(config, "w") as file:
+        file.write(f"[postgresql]\nhost={directory}\ndatabase=loadtest\nuser=postgres\n")
+    return config
+
+
+def start_server(env: Dict[str, str], port: int, workers: int, timeout: float = 60) -> subprocess.Popen:
+    """Starts gunicorn and waits until a worker reports ready."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app", "--access-logfile", os.devnull],
+        env={**env, "PORT": str(port), "WEB_CONCURRENCY": str(workers)},
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The server exited with status {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/health/ready", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("The server did not become ready in time")
+
+
+def seed(owners: int, projects_per_owner: int) -> List[str]:
+    """
+    Inserts owners sharing one password hash and their projects, straight into the database.
+
+    Returns:
+        E-mails of the seeded owners
+    """
+    from app.catalog import refresh_catalog
+    from app.database.pool import get_sync_connection
+    from app.hashing import pwd_context
+    from app.pydantic_models import ProjectRequest
+    from app.simulation import PrioritizationSystem
+
+    refresh_catalog()
+    password_hash = pwd_context.hash(PASSWORD)
+    details = [PrioritizationSystem(ProjectRequest(**payload)).prioritize().to_json_bytes().decode()
+               for payload in random_projects(20, seed=1)]
+    run = int(time.time())
+    emails = [f"load-{run}-{i}@example.com" for i in range(owners)]
+    with get_sync_connection() as conn:
+        with conn.cursor() as cur:
+            cur.executemany(
+                "INSERT INTO Owner (name, firstname, email, password) VALUES ('Load', 'Test', %s, %s)",
+                [(email, password_hash) for email in emails],
+            )
+            cur.execute("SELECT id FROM Owner WHERE email = ANY(%s)", (emails,))
+            owner_ids = [row[0] for row in cur.fetchall()]
+            cur.executemany(
+                "INSERT INTO Test (name, description, owner_id, details) VALUES (%s, 'Seeded', %s, %s::jsonb)",
+                [(f"Projet {i}", owner_id, details[i % len(details)])
+                 for owner_id in owner_ids for i in range(projects_per_owner)],
+            )
+    return emails
+
+
+class Recorder:
+    """Latencies and errors per route."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route: str, started: float, status: Optional[int], error: Optional[str] = None):
+        self.latencies[route].append((time.perf_counter() - started) * 1000)
+        if error is not None or status is None or status >= 400:
+            self.errors[route][error or str(status)] += 1
+
+    def report(self, elapsed: float) -> Dict[str, dict]:
+        report = {}
+        for route in ROUTES:
+            samples = np.asarray(self.latencies.get(route, []))
+            if not len(samples):
+                continue
+            report[route] = {
+                "requests": int(len(samples)),
+                "rps": len(samples) / elapsed,
+                "p50_ms": float(np.percentile(samples, 50)),
+                "p95_ms": float(np.percentile(samples, 95)),
+                "p99_ms": float(np.percentile(samples, 99)),
+                "errors": dict(self.errors.get(route, {})),
+            }
+        return report
+
+
+async def virtual_user(client: httpx.AsyncClient, email: str, mix: Dict[str, float], deadline: float,
+                       recorder: Recorder, rng: random.Random):
+    routes, weights = zip(*mix.items())
+    token = None
+    project_ids: List[int] = []
+
+    async def call(route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            recorder.record(route, started, None, type(e).__name__)
+            return None
+        recorder.record(route, started, response.status_code)
+        return response
+
+    while time.monotonic() < deadline:
+        route = "login" if token is None else rng.choices(routes, weights)[0]
+        if route == "get" and not project_ids:
+            route = "retrieve"
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        if route == "login":
+            response = await call(route, "POST", "/api/auth/login", json={"email": email, "password": PASSWORD})
+            if response is not None and response.status_code == 200:
+                token = response.json()["access_token"]
+        elif route == "create":
+            await call(route, "POST", "/api/projects/create", json=random_project(rng), headers=headers)
+        elif route == "retrieve":
+            response = await call(route, "GET", "/api/projects/retrieve", params={"limit": 20}, headers=headers)
+            if response is not None and response.status_code == 200:
+                project_ids = [project["id"] for project in response.json()]
+        elif route == "get":
+            await call(route, "GET", f"/api/projects/{rng.choice(project_ids)}", headers=headers)
+
+
+async def drive(base_url: str, emails: List[str], concurrency: int, duration: float, mix: Dict[str, float],
+                seed: int) -> Dict[str, dict]:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        started = time.perf_counter()
+        deadline = time.monotonic() + duration
+        await asyncio.gather(*(
+            virtual_user(client, emails[i % len(emails)], mix, deadline, recorder, random.Random(seed + i))
+            for i in range(concurrency)
+        ))
+        return recorder.report(time.perf_counter() - started)
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        route, _, weight = part.partition("=")
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f"Unknown route {route!r}, expected one of {', '.join(ROUTES)}")
+        mix[route] = float(weight or 1)
+    return mix
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--local-db", action="store_true", help="Run against a throwaway local PostgreSQL")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn workers")
+    parser.add_argument("--pool-size", type=int, default=10, help="DB_POOL_MAX_SIZE of each worker")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="Cost of the seeded password hashes")
+    parser.add_argument("--concurrency", type=int, default=50, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of traffic")
+    parser.add_argument("--owners", type=int, default=50)
+    parser.add_argument("--projects-per-owner", type=int, default=50)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("login=1,create=2,retrieve=5,get=5"),
+                        help="Relative weight of each route once logged in")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as directory:
+        if args.local_db:
+            os.environ["CONFIG_FILE"] = start_local_database(directory)
+            # Local sockets use trust authentication; the application still requires a value
+            os.environ.setdefault("POSTGRES_PASSWORD", "load-test")
+        # Read by the server and by the seeding below, which imports the application lazily
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+        env = {**os.environ, "DB_POOL_MAX_SIZE": str(args.pool_size)}
+
+        port = free_port()
+        server = start_server(env, port, args.workers)
+        try:
+            emails = seed(args.owners, args.projects_per_owner)
+            report = asyncio.run(drive(f"http://127.0.0.1:{port}", emails, args.concurrency, args.duration,
+                                       args.mix, args.seed))
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+
+    print(f"{args.workers} worker(s), pool {args.pool_size}, {args.concurrency} virtual users, {args.duration:.0f}s")
+    print(f"{'route':<10} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  errors")
+    for route, stats in report.items():
+        print(f"{route:<10} {stats['requests']:>9} {stats['rps']:>8.1f} {stats['p50_ms']:>8.1f} "
+              f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}  {stats['errors'] or '-'}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"settings": {k: v for k, v in vars(args).items() if k != "output"}, "routes": report},
+                      file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
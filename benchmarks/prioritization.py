@@ -0,0 +1,197 @@
+"""
+Benchmarks PrioritizationSystem against an in-memory work catalog.
+
+Every stage of a simulation is timed separately over the same synthetic projects
+(covering every profile, roof type, income bracket and adjustment branch, then random
+ones), followed by an end-to-end pass, a throughput pass and an allocation pass
+under tracemalloc. No database is needed.
+
+    python -m benchmarks.prioritization --projects 2000 --output bench.json
+    python -m benchmarks.prioritization --compare bench.json --threshold 0.15
+
+With --compare, the run exits with status 1 if the p50 of a stage or of the
+end-to-end latency grew by more than the threshold.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from app.catalog import load_catalog
+from app.database.migrations import SEED_WORKS
+from app.pydantic_models import ProjectRequest
+from app.scoring import rank_works
+from app.simulation import PrioritizationSystem
+from benchmarks.synthetic import covering_projects, random_projects
+
+PERCENTILES = (50, 90, 99)
+
+
+def summarize(samples_ns: List[int]) -> Dict[str, float]:
+    """Returns percentiles, mean and max of timings, in microseconds."""
+    samples = np.asarray(samples_ns, dtype=np.float64) / 1e3
+    summary = {f"p{p}": float(np.percentile(samples, p)) for p in PERCENTILES}
+    summary["mean"] = float(samples.mean())
+    summary["max"] = float(samples.max())
+    return summary
+
+
+def run_stages(system: PrioritizationSystem, timings: Dict[str, List[int]]):
+    """Runs prioritize() one stage at a time, recording the duration of each stage."""
+    clock = time.perf_counter_ns
+
+    def stage(name: str, fn: Callable, *args):
+        started = clock()
+        result = fn(*args)
+        timings[name].append(clock() - started)
+        return result
+
+    scores = stage("base_scores", system._calculate_base_scores)
+    scores = stage("housing_adjustments", system._apply_housing_adjustments, scores)
+    scores = stage("budget_adjustments", system._apply_budget_adjustments, scores)
+    scores = stage("technical_adjustments", system._apply_technical_adjustments, scores)
+    works = stage("ranking", rank_works, scores)
+    stage("eligible_grants", system._calculate_eligible_prime, works)
+
+
+def end_to_end(project: ProjectRequest) -> bytes:
+    return PrioritizationSystem(project).prioritize().to_json_bytes()
+
+
+def benchmark(projects: List[ProjectRequest], rounds: int) -> Dict[str, Any]:
+    stages: Dict[str, List[int]] = {name: [] for name in (
+        "init", "base_scores", "housing_adjustments", "budget_adjustments", "technical_adjustments",
+        "ranking", "eligible_grants", "serialization")}
+    e2e: List[int] = []
+    clock = time.perf_counter_ns
+
+    # Warm-up: compiles the scoring tables and touches every code path once
+    for project in projects[:50]:
+        end_to_end(project)
+
+    for _ in range(rounds):
+        for project in projects:
+            started = clock()
+            system = PrioritizationSystem(project)
+            stages["init"].append(clock() - started)
+            run_stages(system, stages)
+            result = system.prioritize()
+            started = clock()
+            result.to_json_bytes()
+            stages["serialization"].append(clock() - started)
+
+        for project in projects:
+            started = clock()
+            end_to_end(project)
+            e2e.append(clock() - started)
+
+    started = time.perf_counter()
+    for project in projects:
+        end_to_end(project)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    for project in projects:
+        end_to_end(project)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename") if stat.size_diff > 0)
+    allocations = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+
+    return {
+        "stages": {name: summarize(samples) for name, samples in stages.items()},
+        "end_to_end": summarize(e2e),
+        "throughput_per_s": len(projects) / elapsed,
+        "memory": {
+            "peak_kib": peak / 1024,
+            "retained_kib_per_run": allocated / 1024 / len(projects),
+            "retained_blocks_per_run": allocations / len(projects),
+        },
+    }
+
+
+def metadata(args) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "projects": args.projects,
+        "rounds": args.rounds,
+        "seed": args.seed,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> bool:
+    """Prints p50 changes against a previous run; returns False if one grew beyond the threshold."""
+    ok = True
+    rows = [(f"stage {name}", summary["p50"], baseline["stages"].get(name, {}).get("p50"))
+            for name, summary in current["stages"].items()]
+    rows.append(("end to end", current["end_to_end"]["p50"], baseline["end_to_end"]["p50"]))
+    print(f"\nCompared with {baseline['metadata'].get('commit')} ({baseline['metadata'].get('date')})")
+    for name, now, before in rows:
+        if before is None:
+            print(f"  {name:<30} {now:>10.1f} µs   (new)")
+            continue
+        change = (now - before) / before
+        flag = "REGRESSION" if change > threshold else ""
+        ok &= change <= threshold
+        print(f"  {name:<30} {before:>10.1f} -> {now:>10.1f} µs  {change:+7.1%} {flag}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=2000, help="Synthetic projects per round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Tolerated relative p50 increase")
+    args = parser.parse_args()
+
+    load_catalog(list(SEED_WORKS))
+    payloads = list(covering_projects())
+    payloads += random_projects(max(0, args.projects - len(payloads)), seed=args.seed)
+    projects = [ProjectRequest(**payload) for payload in payloads]
+
+    results = {"metadata": metadata(args), **benchmark(projects, args.rounds)}
+
+    print(f"{'stage':<24} " + " ".join(f"{f'p{p} µs':>10}" for p in PERCENTILES) + f" {'mean µs':>10}")
+    for name, summary in [*results["stages"].items(), ("END TO END", results["end_to_end"])]:
+        print(f"{name:<24} " + " ".join(f"{summary[f'p{p}']:>10.1f}" for p in PERCENTILES)
+              + f" {summary['mean']:>10.1f}")
+    print(f"throughput: {results['throughput_per_s']:.0f} simulations/s")
+    print("memory: peak {peak_kib:.0f} KiB, retained {retained_kib_per_run:.2f} KiB "
+          "and {retained_blocks_per_run:.1f} blocks per simulation".format(**results["memory"]))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if not compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
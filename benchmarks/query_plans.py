@@ -0,0 +1,109 @@
+"""
+Checks that the listing queries are served by the indexes of migration 4.
+
+Synthetic owners, homes, simulations and projects are inserted in a transaction
+that is rolled back at the end, so the database is left untouched.
+
+    python -m benchmarks.query_plans --rows 20000
+
+Exits with status 1 if a query does not use its index.
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Iterator
+
+from app.database.migrations import migrate
+from app.database.pool import get_sync_connection
+
+# (name, query, expected index)
+QUERIES = (
+    ("project page",
+     "SELECT id, name, description FROM Test WHERE owner_id = %(owner)s AND id > 0 ORDER BY id LIMIT 101",
+     "test_owner_id_idx"),
+    ("homes of an owner",
+     "SELECT id, name FROM Home WHERE onwer_id = %(owner)s",
+     "home_onwer_id_idx"),
+    ("simulations of a home",
+     "SELECT id, date FROM Simulation WHERE home_id = %(home)s",
+     "simulation_home_id_idx"),
+)
+
+
+def seed(cur, rows: int, owners: int):
+    cur.execute("""
+                INSERT INTO Owner (name, firstname, email, password)
+                SELECT 'bench', 'bench', 'bench-' || g || '@example.invalid', 'x'
+                FROM generate_series(1, %s) g
+                """, (owners,))
+    cur.execute("SELECT min(id) FROM Owner WHERE email LIKE 'bench-%%@example.invalid'")
+    first_owner = cur.fetchone()[0]
+    cur.execute("""
+                INSERT INTO Test (name, description, owner_id, details)
+                SELECT 'p' || g, 'bench', %s + g %% %s, '[]'::jsonb FROM generate_series(1, %s) g
+                """, (first_owner, owners, rows))
+    cur.execute("""
+                INSERT INTO Home (name, description, profile, region, surface, roof_type, housing_type,
+                                  heating_type, average_temp, programmable_thermostat, windows_type,
+                                  wall_insulation, roof_insulation, floor_insulation, house_income, child_number,
+                                  renovation_method, floor_number, has_solar_panels, has_water_heater, boiler_type,
+                                  ventilation_type, onwer_id)
+                SELECT 'h' || g, 'bench', 'Economy', 'Wallonie', '100', 'flat', 'maison', 'gaz', '18-20', 'non',
+                       'double', 'non', 'non', 'non', '30000', '0', 'entrepreneur', '1', 'non', 'non', 'gaz',
+                       'naturelle', %s + g %% %s
+                FROM generate_series(1, %s) g
+                """, (first_owner, owners, rows))
+    cur.execute("""
+                INSERT INTO Simulation (date, details, home_id)
+                SELECT '2024-01-01', '[]'::jsonb, h.id FROM Home h WHERE h.description = 'bench'
+                """)
+    cur.execute("ANALYZE Owner, Test, Home, Simulation")
+    cur.execute("SELECT %s + 1, (SELECT min(id) FROM Home WHERE description = 'bench')", (first_owner,))
+    owner, home = cur.fetchone()
+    return {"owner": owner, "home": home}
+
+
+def plan_nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="Projects and homes to insert")
+    parser.add_argument("--owners", type=int, default=200, help="Owners the rows are spread over")
+    args = parser.parse_args()
+
+    migrate()
+    failures = 0
+    with get_sync_connection() as conn:
+        with conn.cursor() as cur:
+            params = seed(cur, args.rows, args.owners)
+            for name, query, index in QUERIES:
+                cur.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + query, params)
+                result = cur.fetchone()[0]
+                result = json.loads(result) if isinstance(result, str) else result
+                plan = result[0]["Plan"]
+                indexes = {node.get("Index Name") for node in plan_nodes(plan)} - {None}
+                ok = index in indexes
+                failures += not ok
+                print(f"{'ok  ' if ok else 'FAIL'} {name:<24} {plan['Node Type']:<20} "
+                      f"index={','.join(sorted(indexes)) or '-':<24} {result[0]['Execution Time']:.3f} ms")
+
+            # Reference timing without the indexes
+            cur.execute("SET LOCAL enable_indexscan = off")
+            cur.execute("SET LOCAL enable_bitmapscan = off")
+            cur.execute("SET LOCAL enable_indexonlyscan = off")
+            for name, query, _ in QUERIES:
+                started = time.perf_counter()
+                cur.execute(query, params)
+                cur.fetchall()
+                print(f"     {name:<24} without index: {(time.perf_counter() - started) * 1000:.3f} ms")
+        conn.rollback()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
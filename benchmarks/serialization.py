@@ -0,0 +1,95 @@
+"""
+Compares the cost of rendering each endpoint's JSON body before and after
+ORJSONResponse became the default response class.
+
+"before" is what FastAPI did for a returned dict: jsonable_encoder followed by
+JSONResponse (stdlib json). For listings, "before" also decodes the stored details,
+as the handlers used to. "after" is the current rendering path of the handler.
+
+    python -m benchmarks.serialization --repeat 200
+
+The work catalog is read from the configured database.
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Dict, List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.batch import prioritize_batch
+from app.catalog import refresh_catalog
+from app.pydantic_models import ProjectRequest
+from app.simulation import PrioritizationSystem
+from app.weighting_registry import get_weighting
+from benchmarks.synthetic import random_projects
+
+
+def timed(render: Callable[[], bytes], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def cases(batch_size: int, page_size: int) -> Dict[str, tuple]:
+    projects = [ProjectRequest(**payload) for payload in random_projects(max(batch_size, page_size), seed=1)]
+    result = PrioritizationSystem(projects[0]).prioritize()
+    dataframe = result.to_dataframe()
+    stored = [PrioritizationSystem(project).prioritize().to_json_bytes().decode() for project in projects[:page_size]]
+    page_rows = [(i, f"Projet {i}", "Description", details) for i, details in enumerate(stored, 1)]
+    weighting = get_weighting().as_files()
+    batch = prioritize_batch(projects[:batch_size]).as_payload()
+
+    def page_before():
+        return [{"id": i, "name": n, "description": d, "details": json.loads(t)} for i, n, d, t in page_rows]
+
+    def page_after():
+        return [{"id": i, "name": n, "description": d, "details": orjson.Fragment(t)} for i, n, d, t in page_rows]
+
+    return {
+        "GET /api/admin/weighting": (
+            lambda: JSONResponse(jsonable_encoder(weighting)).body,
+            lambda: ORJSONResponse(weighting).body,
+        ),
+        "POST /api/projects/create": (
+            lambda: JSONResponse(jsonable_encoder(dataframe.to_json(orient="records"))).body,
+            lambda: orjson.dumps(result.records()),
+        ),
+        f"GET /api/projects/retrieve ({page_size})": (
+            lambda: JSONResponse(jsonable_encoder(page_before())).body,
+            lambda: ORJSONResponse(page_after()).body,
+        ),
+        f"POST /api/projects/simulate-batch ({batch_size})": (
+            lambda: JSONResponse(jsonable_encoder(batch)).body,
+            lambda: ORJSONResponse(batch).body,
+        ),
+        "GET /api/auth/check-admin": (
+            lambda: JSONResponse(jsonable_encoder({"is_admin": False})).body,
+            lambda: ORJSONResponse({"is_admin": False}).body,
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    refresh_catalog()
+    print(f"{'endpoint':<42} {'before µs':>12} {'after µs':>12} {'speedup':>8}")
+    for name, (before, after) in cases(args.batch_size, args.page_size).items():
+        before_us = statistics.median(timed(before, args.repeat))
+        after_us = statistics.median(timed(after, args.repeat))
+        print(f"{name:<42} {before_us:>12.1f} {after_us:>12.1f} {before_us / after_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
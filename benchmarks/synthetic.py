@@ -0,0 +1,70 @@
+"""Synthetic project payloads covering every value the scoring rules distinguish."""
+import random
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+PROFILES = ("Eco-friendly", "Economy", "Valuation", "Comfort", "Other")
+
+# Values of each field; every adjustment branch and income bracket (R1-R4 and none) is reachable
+FIELD_VALUES: Dict[str, Dict[str, Sequence[Any]]] = {
+    "housingData": {
+        "surface": (30, 50, 80, 120, 200, 350),
+        "roofType": ("flat", "single", "double"),
+        "heatingType": ("pompe_a_chaleur", "gaz", "mazout"),
+        "averageTemperature": ("<18", "18-20", ">20"),
+        "programmableThermostat": ("oui", "non"),
+        "windowType": ("simple", "double"),
+        "wallInsulation": ("oui", "non"),
+        "roofInsulation": ("oui", "non"),
+        "floorInsulation": ("oui", "non"),
+    },
+    "budgetData": {
+        "totalBudget": (100, 500, 5000, 20000, 60000, 150000),
+        "householdIncome": (15000, 30000, 40000, 60000, 100000, 200000),
+        "childNumber": (0, 1, 2, 3),
+        "propertyType": ("house", "apartment", "other"),
+        "renovationMethod": ("professional", "do_it_yourself", "mixed"),
+        "floorNumber": (1, 2, 3),
+    },
+    "technicalData": {
+        "hasSolarPanels": ("oui", "non"),
+        "hasWaterHeater": ("oui", "non"),
+        "boilerType": ("pompe_a_chaleur", "gaz"),
+        "ventilationType": ("naturelle", "mechanique", "double_flux"),
+    },
+}
+
+
+def _project(profile: str, pick) -> Dict[str, Any]:
+    return {
+        "name": "Synthetic project",
+        "description": "Generated for benchmarking",
+        "profileData": profile,
+        "region": "wallonie",
+        **{
+            section: {field: str(pick(values)) for field, values in fields.items()}
+            for section, fields in FIELD_VALUES.items()
+        },
+    }
+
+
+def random_project(rng: random.Random) -> Dict[str, Any]:
+    """Returns one ProjectRequest payload drawn from ``rng``."""
+    return _project(rng.choice(PROFILES), rng.choice)
+
+
+def covering_projects() -> Iterator[Dict[str, Any]]:
+    """
+    Yields a few payloads in which every value of every field appears at least once.
+
+    Project ``i`` takes the ``i``-th value of each field, cycling through shorter lists.
+    """
+    width = max([len(PROFILES)] + [len(values) for fields in FIELD_VALUES.values() for values in fields.values()])
+    for i in range(width):
+        yield _project(PROFILES[i % len(PROFILES)], lambda values: values[i % len(values)])
+
+
+def random_projects(count: int, seed: Optional[int] = 0) -> Iterator[Dict[str, Any]]:
+    """Yields ``count`` payloads; the same seed always gives the same sequence."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield random_project(rng)
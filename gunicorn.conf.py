@@ -0,0 +1,45 @@
+"""
+Production server configuration.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The application is imported once in the master (preload_app). Migrations and the
+warm-up run there before any worker is forked: the work catalog, the weighting
+snapshot and the compiled scoring tables are then shared copy-on-write by the
+workers. Each worker still opens its own database pool and background threads.
+
+Settings come from the environment: PORT, WEB_CONCURRENCY (worker count),
+GUNICORN_TIMEOUT and GUNICORN_GRACEFUL_TIMEOUT.
+"""
+import multiprocessing
+import os
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', str(min(4, multiprocessing.cpu_count()))))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+accesslog = "-"
+
+# Must be set before the application (and prometheus_client) is imported by the preload
+if not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix="prometheus-")
+
+
+def on_starting(server):
+    from app.database.migrations import migrate
+    from app.warmup import warm_up, freeze_for_fork
+
+    applied = migrate()
+    if applied:
+        server.log.info("Applied migrations %s", applied)
+    server.log.info("Warmed up before forking: %s", warm_up())
+    server.log.info("Froze %d objects before forking workers", freeze_for_fork())
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
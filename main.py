@@ -1,7 +1,7 @@
 import uvicorn
-from app.database.create_tables import create_tables, insert_data
+from app.database.migrations import migrate
 
+# Development server with auto-reload; production runs gunicorn -c gunicorn.conf.py app.main:app
 if __name__ == "__main__":
-    create_tables()
-    insert_data()
+    migrate()
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,30 @@
+import json
+import os
+
+import pytest
+
+from app.catalog import load_catalog
+from app.database.migrations import SEED_WORKS
+from app.pydantic_models import ProjectRequest
+from app.weighting_registry import get_weighting, load_weighting
+
+
+@pytest.fixture(scope="session", autouse=True)
+def seed_catalog():
+    # Simulations read the in-memory catalog, so the tests need no database
+    return load_catalog(list(SEED_WORKS))
+
+
+@pytest.fixture
+def reference_projects():
+    """Project requests of the scoring reference, as validated models."""
+    with open(os.path.join(os.path.dirname(__file__), "data", "prioritization_reference.json"), encoding="utf-8") as f:
+        return [ProjectRequest(**case["request"]) for case in json.load(f)]
+
+
+@pytest.fixture
+def weighting_files():
+    """Raw weighting files; the snapshot they belong to is installed back after the test."""
+    files = get_weighting().files
+    yield files
+    load_weighting(files)
@@ -0,0 +1,53 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from app.bundle import ParetoFrontier
+
+
+def brute_force_best(costs: np.ndarray, scores: np.ndarray, budget: float) -> float:
+    best = 0.0
+    for size in range(1, len(costs) + 1):
+        for bundle in itertools.combinations(range(len(costs)), size):
+            bundle = list(bundle)
+            if costs[bundle].sum() <= budget:
+                best = max(best, scores[bundle].sum())
+    return best
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_exact_frontier_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    costs = rng.uniform(0, 5000, 10).round()
+    scores = rng.random(10) + .01
+    frontier = ParetoFrontier(costs, scores)
+    assert frontier.exact
+    for budget in (0, 1000, 5000, 12000, 50000):
+        point = frontier.best_within(budget)
+        chosen = frontier.bundles(np.array([point]))[0]
+        assert costs[chosen].sum() <= budget
+        assert scores[chosen].sum() == pytest.approx(brute_force_best(costs, scores, budget))
+
+
+@pytest.mark.parametrize("works", [48, 200])
+@pytest.mark.parametrize("seed", range(10))
+def test_trimmed_frontier_stays_within_budget(seed, works):
+    rng = np.random.default_rng(seed)
+    costs = rng.uniform(500, 20000, works)
+    frontier = ParetoFrontier(costs, rng.random(works) + .01, limit=64)
+    assert not frontier.exact
+    assert len(frontier) <= 64
+    assert frontier.costs[0] == 0
+    for budget in (0, 1000, 3000, 50000, 10 ** 6):
+        point = frontier.best_within(budget)
+        chosen = frontier.bundles(np.array([point]))[0]
+        assert costs[chosen].sum() <= budget + 1e-6
+        assert frontier.costs[point] <= budget
+
+
+def test_no_point_within_budget_returns_the_empty_bundle():
+    # A free work makes the cheapest point cost nothing but score something
+    frontier = ParetoFrontier(np.array([0., 100.]), np.array([1., 2.]))
+    assert frontier.best_within(-1) == -1
+    assert frontier.best_within(0) == 0
@@ -0,0 +1,101 @@
+import itertools
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth import verify_token
+from app.main import app
+from app.planner import RenovationPlanner, plan_renovation
+
+
+def random_instance(rng: np.random.Generator, works: int = 6):
+    heating = np.zeros(works, dtype=bool)
+    heating[rng.choice(works, 2, replace=False)] = True
+    return dict(
+        costs=rng.uniform(500, 6000, works).round(),
+        scores=rng.random(works) + .01,
+        impacts=np.where(heating, 1.0, rng.uniform(1.0, 1.6, works)),
+        heating=heating,
+    )
+
+
+def brute_force_value(costs, scores, impacts, heating, annual_budget: float, years: int) -> float:
+    best = 0.0
+    for assignment in itertools.product(range(-1, years), repeat=len(costs)):
+        assignment = np.array(assignment)
+        if any(costs[assignment == year].sum() > annual_budget for year in range(years)):
+            continue
+        value = 0.0
+        for work in np.flatnonzero(assignment >= 0):
+            gain = scores[work] * (years - assignment[work])
+            if heating[work]:
+                # Within a year, insulation works are best done before the heating works
+                done_before = (assignment >= 0) & (assignment <= assignment[work]) & ~heating
+                gain *= impacts[done_before].prod()
+            value += gain
+        best = max(best, value)
+    return best
+
+
+def plan_value(schedule, sequence, scores, impacts, heating, years: int) -> float:
+    value, boost = 0.0, 1.0
+    for work in sequence:
+        value += scores[work] * (years - schedule[work]) * (boost if heating[work] else 1)
+        boost *= impacts[work]
+    return value
+
+
+@pytest.mark.parametrize("years", [2, 3])
+@pytest.mark.parametrize("seed", range(12))
+def test_exact_search_matches_exhaustive_enumeration(seed, years):
+    rng = np.random.default_rng(seed)
+    instance = random_instance(rng)
+    annual_budget = float(rng.uniform(3000, 12000))
+    planner = RenovationPlanner(annual_budget=annual_budget, years=years, beam_width=10 ** 6, **instance)
+    schedule, sequence, value = planner.solve()
+
+    assert planner.exact
+    assert value == pytest.approx(brute_force_value(annual_budget=annual_budget, years=years, **instance))
+    assert value == pytest.approx(plan_value(schedule, sequence, instance["scores"], instance["impacts"],
+                                             instance["heating"], years))
+    for year in range(years):
+        assert instance["costs"][schedule == year].sum() <= annual_budget
+    assert sorted(sequence.tolist()) == np.flatnonzero(schedule >= 0).tolist()
+    assert (np.diff(schedule[sequence]) >= 0).all()
+
+
+def test_nothing_fits_gives_an_empty_plan():
+    rng = np.random.default_rng(0)
+    instance = random_instance(rng)
+    planner = RenovationPlanner(annual_budget=100, years=3, **instance)
+    schedule, sequence, value = planner.solve()
+    assert (schedule == -1).all()
+    assert len(sequence) == 0
+    assert value == 0
+
+
+@pytest.mark.parametrize("annual_budget", [0, 1500, 8000, None])
+def test_every_year_fits_the_annual_budget(reference_projects, annual_budget):
+    for project in reference_projects:
+        payload = plan_renovation(project, 4, annual_budget).as_payload()
+        scheduled = [work for year in payload["schedule"] for work in year["works"]]
+        assert len(scheduled) == len(set(scheduled))
+        for year in payload["schedule"]:
+            assert year["netCost"] <= payload["annualBudget"] + 1e-6
+
+
+def test_unknown_works_are_rejected(reference_projects):
+    project = reference_projects[0]
+    with pytest.raises(ValueError):
+        plan_renovation(project, 3, works=[999])
+
+    app.dependency_overrides[verify_token] = lambda: {"sub": "test@example.com", "uid": 1}
+    try:
+        response = TestClient(app).post("/api/projects/plan", json={
+            "project": project.model_dump(), "years": 3, "works": [999],
+        })
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 422
+    assert "999" in response.json()["detail"]
@@ -0,0 +1,30 @@
+import pytest
+
+from app.result_cache import result_cache
+from app.simulation import PROFILES, PrioritizationSystem, prioritize, prioritize_profiles
+
+
+@pytest.fixture(autouse=True)
+def empty_result_cache():
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+
+def test_each_profile_is_byte_identical_to_its_own_simulation(reference_projects):
+    for project in reference_projects:
+        results = prioritize_profiles(project)
+        assert set(results) == set(PROFILES)
+        for profile in PROFILES:
+            expected = PrioritizationSystem(project.model_copy(update={"profileData": profile})).prioritize()
+            assert results[profile].to_json_bytes() == expected.to_json_bytes()
+
+
+def test_results_are_cached_under_each_profile_fingerprint(reference_projects):
+    for project in reference_projects:
+        results = prioritize_profiles(project)
+        system = PrioritizationSystem(project)
+        for profile in PROFILES:
+            assert result_cache.get(system.fingerprint(profile)) is results[profile]
+            # The same entry a project naming this profile looks up
+            assert prioritize(project.model_copy(update={"profileData": profile})) is results[profile]
@@ -0,0 +1,39 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.pydantic_models import ProjectRequest
+from app.scoring import rank_works
+from app.simulation import PrioritizationSystem
+
+# Results of the pandas implementation the scoring was vectorized from, on the seed catalog
+with open(os.path.join(os.path.dirname(__file__), "data", "prioritization_reference.json"), encoding="utf-8") as f:
+    REFERENCE = json.load(f)
+
+
+@pytest.mark.parametrize("case", REFERENCE, ids=lambda case: f"{case['request']['profileData']}-{case['incomeCategory']}")
+def test_prioritize_matches_the_reference(case):
+    system = PrioritizationSystem(ProjectRequest(**case["request"]))
+    result = system.prioritize()
+    assert system.income_category == case["incomeCategory"]
+    assert result.works.tolist() == case["works"]
+    # Bit-identical, not approximately equal: ties are ranked on exact scores
+    assert result.scores.tolist() == case["scores"]
+    assert [None if np.isnan(grant) else grant for grant in result.grants.tolist()] == case["grants"]
+
+
+def test_reference_covers_ties():
+    assert any(len(set(case["scores"])) < len(case["scores"]) for case in REFERENCE)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_rank_works_orders_ties_like_pandas(seed):
+    rng = np.random.default_rng(seed)
+    # Few distinct values, so that most scores are tied, and some non-positive ones to drop
+    scores = rng.integers(-2, 5, rng.integers(1, 40)).astype(np.float64) / 4
+    frame = pd.DataFrame({"Score": scores})
+    expected = frame[frame["Score"] > 0].sort_values(by="Score", ascending=False).index.tolist()
+    assert rank_works(scores).tolist() == expected
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from app.pydantic_models import WeightVariant
+from app.simulation import PROFILE_FACTORS, PrioritizationSystem
+from app.weighting_registry import load_weighting
+from app.what_if import prioritize_variants
+
+DESIRES = {"Isolation thermique": 200, "Confort et bien-être": 5}
+FACTORS = {"Production d'énergie renouvelable": 2.0, "Économies d'énergie": 0.5}
+
+
+def assert_same_ranking(result, variant: int, expected):
+    ranking = result.rankings[variant]
+    assert ranking.tolist() == expected.works.tolist()
+    np.testing.assert_allclose(result.scores[variant][ranking], expected.scores, rtol=1e-12)
+    np.testing.assert_array_equal(result.grants[ranking], expected.grants)
+
+
+def test_default_variant_matches_prioritize(reference_projects):
+    for project in reference_projects:
+        result = prioritize_variants(project, [WeightVariant()])
+        assert_same_ranking(result, 0, PrioritizationSystem(project).prioritize())
+
+
+def test_overridden_desires_match_prioritize_with_those_weights(reference_projects, weighting_files):
+    variants = [WeightVariant(desires=DESIRES)]
+    results = [prioritize_variants(project, variants) for project in reference_projects]
+
+    load_weighting({**weighting_files, "desires.json": {**weighting_files["desires.json"], **DESIRES}})
+    for project, result in zip(reference_projects, results):
+        assert_same_ranking(result, 0, PrioritizationSystem(project).prioritize())
+
+
+@pytest.mark.parametrize("profile", PROFILE_FACTORS)
+def test_other_profile_matches_prioritize_under_that_profile(reference_projects, profile):
+    for project in reference_projects:
+        result = prioritize_variants(project, [WeightVariant(profile=profile)])
+        expected = PrioritizationSystem(project.model_copy(update={"profileData": profile})).prioritize()
+        assert_same_ranking(result, 0, expected)
+
+
+def test_explicit_factors_match_prioritize_under_a_profile_with_them(reference_projects, monkeypatch):
+    monkeypatch.setitem(PROFILE_FACTORS, "Custom", FACTORS)
+    for project in reference_projects:
+        result = prioritize_variants(project, [WeightVariant(profileFactors=FACTORS)])
+        expected = PrioritizationSystem(project.model_copy(update={"profileData": "Custom"})).prioritize()
+        assert_same_ranking(result, 0, expected)
+
+
+def test_variants_are_independent(reference_projects):
+    # Several variants in one call rank each like it would alone
+    variants = [WeightVariant(), WeightVariant(desires=DESIRES), WeightVariant(profile="Comfort"),
+                WeightVariant(profileFactors=FACTORS)]
+    for project in reference_projects:
+        together = prioritize_variants(project, variants)
+        for index, variant in enumerate(variants):
+            alone = prioritize_variants(project, [variant])
+            assert together.rankings[index].tolist() == alone.rankings[0].tolist()
+            np.testing.assert_array_equal(together.scores[index], alone.scores[0])